@@ -284,10 +284,24 @@ class CPUInfo(_CPUInfoBase.CPUInfoBase):
         """
 
         if order == "CPU":
-            return sorted(self._read_online_cpus())
+            return list(self._get_sorted_online_cpus())
 
         return self._get_level_nums("CPU", "CPU", "all", order=order)
 
+    def _get_sorted_online_cpus(self):
+        """Return a tuple of online CPU numbers sorted in ascending order."""
+
+        if not self._sorted_cpus:
+            self._sorted_cpus = tuple(sorted(self._read_online_cpus()))
+        return self._sorted_cpus
+
+    def _get_sorted_all_cpus(self):
+        """Return a tuple of online and offline CPU numbers sorted in ascending order."""
+
+        if not self._sorted_all_cpus:
+            self._sorted_all_cpus = tuple(sorted(self._get_all_cpus_set()))
+        return self._sorted_all_cpus
+
     def _get_all_cpus_set(self):
         """Return online and offline CPU numbers as a set."""
 
@@ -390,6 +404,7 @@ class CPUInfo(_CPUInfoBase.CPUInfoBase):
         """
 
         self._cpus = None
+        self._sorted_cpus = None
         self._hybrid_cpus = None
         if self._topology:
             self._must_update_topology = True
@@ -885,14 +900,16 @@ class CPUInfo(_CPUInfoBase.CPUInfoBase):
                          to allow for offline CPUs.
         """
 
+        if cpus == "all":
+            if offline_ok:
+                return list(self._get_sorted_all_cpus())
+            return list(self._get_sorted_online_cpus())
+
         if offline_ok:
             allcpus = self._get_all_cpus_set()
         else:
             allcpus = self._read_online_cpus()
 
-        if cpus == "all":
-            return sorted(allcpus)
-
         cpus = Trivial.list_dedup(cpus)
         for cpu in cpus:
             if type(cpu) is not int: # pylint: disable=unidiomatic-typecheck
@@ -1157,5 +1174,8 @@ class CPUInfo(_CPUInfoBase.CPUInfoBase):
         self._cacheinfo = None
         # Set of online and offline CPUs.
         self._all_cpus = None
+        # Sorted tuples of online CPUs and of online and offline CPUs.
+        self._sorted_cpus = None
+        self._sorted_all_cpus = None
         # Dictionary of P-core/E-core CPUs.
         self._hybrid_cpus = None
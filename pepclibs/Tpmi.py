@@ -98,6 +98,7 @@ Terminology.
 
 import os
 import re
+import copy
 import stat
 import logging
 import contextlib
@@ -120,6 +121,18 @@ _MAX_SPEC_FILE_BYTES = 4 * 1024 * 1024 * 1024
 
 _LOG = logging.getLogger()
 
+# The spec dictionaries and the feature dictionaries caches. They are shared by all 'Tpmi' objects,
+# so that spec files are not loaded again for every new 'Tpmi' object. The caches are indexed by
+# the spec file path, modification time, and size tuple, so that a modified spec file gets loaded
+# again. The cached dictionaries are never handed out, copies are returned instead, so that
+# modifying a dictionary of one 'Tpmi' object does not affect other 'Tpmi' objects.
+_SDICTS_CACHE = {}
+_FDICTS_CACHE = {}
+
+def _get_spec_cache_key(specpath, st):
+    """Return the spec file caches key for spec file 'specpath' with 'stat()' results 'st'."""
+    return (str(specpath), st.st_mtime_ns, st.st_size)
+
 def _find_spec_dirs():
     """Find paths to TPMI spec directories and return them as a list."""
 
@@ -166,6 +179,10 @@ def _load_sdict(specpath):
     if not stat.S_ISREG(st.st_mode):
         raise Error(f"'{specpath}' is not a regular file")
 
+    cache_key = _get_spec_cache_key(specpath, st)
+    if cache_key in _SDICTS_CACHE:
+        return _SDICTS_CACHE[cache_key].copy()
+
     try:
         try:
             fobj = open(specpath, "r", encoding="utf-8") # pylint: disable=consider-using-with
@@ -215,6 +232,7 @@ def _load_sdict(specpath):
             fobj.close()
 
     sdict["path"] = specpath
+    _SDICTS_CACHE[cache_key] = sdict.copy()
     return sdict
 
 class Tpmi():
@@ -228,8 +246,10 @@ class Tpmi():
                         the feature).
       * 'iter_feature()' - get feature details.
       * 'read_register()' - read a TPMI register.
+      * 'read_registers()' - read multiple TPMI registers.
       * 'write_register()' - write to a TPMI register.
       * 'get_bitfield()' - extract a bitfield value from a register value.
+      * 'get_bitfields()' - extract multiple bitfield values from a register value.
     """
 
     def _format_fdict(self, fname, specpath, spec):
@@ -352,10 +372,19 @@ class Tpmi():
 
         for specdir in self._specdirs:
             specpath = specdir / (fname + ".yml")
-            if specpath.exists():
+            try:
+                st = specpath.stat()
+            except FileNotFoundError:
+                continue
+
+            cache_key = _get_spec_cache_key(specpath, st)
+            if cache_key not in _FDICTS_CACHE:
                 spec = YAML.load(specpath)
-                self._fdicts[fname] = self._format_fdict(fname, specpath, spec)
-                break
+                _FDICTS_CACHE[cache_key] = self._format_fdict(fname, specpath, spec)
+
+            # Copying is still a lot faster than loading and validating the spec file.
+            self._fdicts[fname] = copy.deepcopy(_FDICTS_CACHE[cache_key])
+            break
 
         if fname not in self._fdicts:
             raise ErrorNotSupported(f"TPMI feature '{fname}' is not supported")
@@ -615,6 +644,17 @@ class Tpmi():
             fobj.seek(mdmap[instance][offset])
             val = fobj.read(8)
 
+        return self._parse(val, 0, fname, regname, offset)
+
+    @staticmethod
+    def _parse(text, pos, fname, regname, offset):
+        """
+        Parse the 32-bit TPMI register value at position 'pos' of 'text' (the 'mem_dump' file
+        contents or a part of it) and return the result.
+        """
+
+        val = text[pos:pos + 8]
+
         what = f"value of register '{regname}' (offset '{offset:#x}') of TPMI feature '{fname}'"
         return Trivial.str_to_int(val, base=16, what=what)
 
@@ -650,6 +690,25 @@ class Tpmi():
 
         return (regval & bfdict["bitmask"]) >> bfdict["bitshift"]
 
+    def _get_bitfields(self, regval, fname, regname, bfnames):
+        """
+        Extract values of multiple bit fields from a register value and return them in a dictionary
+        indexed by bit field names. The arguments are the same as in 'get_bitfields()'.
+        """
+
+        fieldsdict = self._get_regdict(fname, regname)["fields"]
+
+        bfvals = {}
+        for bfname in bfnames:
+            bfdict = fieldsdict.get(bfname)
+            if bfdict is None:
+                # Let '_get_bfdict()' raise the exception.
+                bfdict = self._get_bfdict(fname, regname, bfname)
+
+            bfvals[bfname] = (regval & bfdict["bitmask"]) >> bfdict["bitshift"]
+
+        return bfvals
+
     def _set_bitfield(self, regval, bitval, fname, regname, bfname):
         """
         Set a register bit field to value 'value' and return the new register value. The arguments
@@ -683,7 +742,7 @@ class Tpmi():
         width = regdict["width"]
 
         if not mdmap:
-            mdmap = self._build_mdmap(addr, fname)
+            mdmap = self._get_mdmap(fname, addr)
 
         val = self._read(addr, fname, instance, regname, offset, mdmap)
         if width > 32:
@@ -694,6 +753,41 @@ class Tpmi():
 
         return val
 
+    def _read_registers(self, fname, addr, instance, regnames):
+        """
+        Read multiple TPMI registers of a TPMI feature instance and return a dictionary of register
+        values indexed by register names. The 'mem_dump' file is read only once. The arguments are
+        as follows.
+          * fname - name of the TPMI feature the registers belong to.
+          * addr - the TPMI device address.
+          * instance - the TPMI instance to read the registers from.
+          * regnames - names of the TPMI registers to read.
+        """
+
+        mdmap = self._get_mdmap(fname, addr)
+
+        path = self._get_debugfs_feature_path(addr, fname)
+        path = path / "mem_dump"
+
+        with self._pman.open(path, "r") as fobj:
+            mem_dump = fobj.read()
+
+        regvals = {}
+        for regname in regnames:
+            regdict = self._get_regdict(fname, regname)
+            offset = regdict["offset"]
+
+            self._validate_instance_offset(fname, addr, instance, regname, offset, mdmap)
+            val = self._parse(mem_dump, mdmap[instance][offset], fname, regname, offset)
+            if regdict["width"] > 32:
+                self._validate_instance_offset(fname, addr, instance, regname, offset + 4, mdmap)
+                pos = mdmap[instance][offset + 4]
+                val += self._parse(mem_dump, pos, fname, regname, offset + 4) << 32
+
+            regvals[regname] = val
+
+        return regvals
+
     def _write_register(self, value, fname, addr, instance, regname, bfname=None):
         """
         Write to a TPMI register. The arguments are as follows.
@@ -941,6 +1035,25 @@ class Tpmi():
 
         return self._read_register(fname, addr, instance, regname, bfname=bfname)
 
+    def read_registers(self, fname, addr, instance, regnames):
+        """
+        Read multiple TPMI registers of a TPMI feature instance and return a dictionary of register
+        values indexed by register names. This is faster than reading the registers one by one. The
+        arguments are as follows.
+          * fname - name of the TPMI feature to read.
+          * addr - the TPM device PCI address.
+          * instance - the TPMI instance number to read.
+          * regnames - names of the TPMI registers to read.
+        """
+
+        self._validate_fname(fname)
+        self._validate_addr(fname, addr)
+        for regname in regnames:
+            self._validate_regname(fname, regname)
+        self._validate_instance(fname, addr, instance)
+
+        return self._read_registers(fname, addr, instance, regnames)
+
     def get_bitfield(self, regval, fname, regname, bfname):
         """
         Extract and return the value of a bit field from a register value. The arguments are as
@@ -954,6 +1067,19 @@ class Tpmi():
         self._validate_fname(fname)
         return self._get_bitfield(regval, fname, regname, bfname)
 
+    def get_bitfields(self, regval, fname, regname, bfnames):
+        """
+        Extract values of multiple bit fields from a register value and return them in a dictionary
+        indexed by bit field names. The arguments are as follows.
+          * regval - value of the register.
+          * fname - name of the TPMI feature.
+          * regname - name of the TPMI register.
+          * bfnames - names of the TPMI register bit fields to extract.
+        """
+
+        self._validate_fname(fname)
+        return self._get_bitfields(regval, fname, regname, bfnames)
+
     def write_register(self, value, fname, addr, instance, regname, bfname=None):
         """
         Write to a TPMI register. The arguments are as follows.
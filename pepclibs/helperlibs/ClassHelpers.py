@@ -23,6 +23,9 @@ class SimpleCloseContext():
     default implementation of the context manager that just calls 'close()' on exit.
     """
 
+    # No instance attributes, so that sub-classes can use '__slots__'.
+    __slots__ = ()
+
     def __enter__(self):
         """Enter the run-time context."""
         return self
@@ -461,6 +461,7 @@ class EmulProcessManager(LocalProcessManager.LocalProcessManager):
             self.hostname = "emulated local host"
         self.hostmsg = f" on '{self.hostname}'"
         self.is_remote = False
+        self.is_emulated = True
 
         self.datapath = None
         # Data for emulated read-only files.
@@ -240,14 +240,16 @@ def duration_ns(value, sep=""):
     result += sep + scaler
     return result
 
-def _tokenize(hval, specs, name=None, multiple=True):
+def _tokenize(hval, specs, lcspecs, name=None, multiple=True):
     """
-    Split human-provided value 'hval' according unit names in the 'specs' dictionary. Returns the
-    dictionary of tokens.
+    Split human-provided value 'hval' according unit names in the 'specs' dictionary. The 'lcspecs'
+    argument is a tuple of '(spec, lowercase spec)' pairs for every specifier in 'specs', in the
+    same order. Returns the dictionary of tokens.
 
     Example.
         * hval = "1d 4m 1s"
         * specs = {"d" : "days", "m" : "minutes", "s" : "seconds"}
+        * lcspecs = (("d", "d"), ("m", "m"), ("s", "s"))
         * Result: {'d': '1', 'm': '4', 's': '1'}
 
     The 'multiple' argument can be used to limit the input value to just a single number and unit.
@@ -261,8 +263,8 @@ def _tokenize(hval, specs, name=None, multiple=True):
 
     tokens = {}
     rest = hval.lower()
-    for spec in specs:
-        split = rest.split(spec.lower(), 1)
+    for spec, lcspec in lcspecs:
+        split = rest.split(lcspec, 1)
         if len(split) > 1:
             tokens[spec] = split[0]
             rest = split[1]
@@ -286,26 +288,39 @@ def _tokenize(hval, specs, name=None, multiple=True):
         else:
             # This is the last element. It can be a floating point or integer.
             try:
-                tokens[spec] = float(val)
+                fval = float(val)
             except:
                 raise Error(f"failed to parse{name} value '{hval}': non-numeric amount of "
                             f"{specs[spec]}") from None
 
-            if Trivial.is_int(val):
+            # Note, 'val' is lowercase, so checking for "e" covers the exponent notation too.
+            if fval.is_integer() and "." not in val and "e" not in val:
                 tokens[spec] = int(val)
+            else:
+                tokens[spec] = fval
 
     return tokens
 
+# The '_tokenize_prepare()' results cache, indexed by unit.
+_TOKENIZE_PREPARE_CACHE = {}
+
 def _tokenize_prepare(unit):
     """
     Prepare for tokenizing a human-oriented value where the expected unit is 'unit'. Returns a tuple
-    of the following 3 elements.
+    of the following 4 elements.
       * specs - the specifiers dictionary, suitable for passing to the '_tokenize()' function.
+      * lcspecs - the '(spec, lowercase spec)' pairs, suitable for passing to the '_tokenize()'
+                  function.
       * scalers - the scalers dictionary, with key being the specifiers from 'specs' and values
                   being the scaling factors.
       * multiple - value of the 'multiple' argument that can be passed to '_tokenize()'.
+
+    The results are cached, so the specifiers are built and lowercased only once per unit.
     """
 
+    if unit in _TOKENIZE_PREPARE_CACHE:
+        return _TOKENIZE_PREPARE_CACHE[unit]
+
     # Create the specifiers dictionary.
     specs = {}
     scalers = {}
@@ -343,7 +358,10 @@ def _tokenize_prepare(unit):
     specs[unit] = fullname
     scalers[unit] = 1
 
-    return specs, scalers, multiple
+    lcspecs = tuple((spec, spec.lower()) for spec in specs)
+
+    _TOKENIZE_PREPARE_CACHE[unit] = (specs, lcspecs, scalers, multiple)
+    return _TOKENIZE_PREPARE_CACHE[unit]
 
 def parse_human(hval, unit, target_unit=None, integer=True, name=None):
     """
@@ -386,8 +404,8 @@ def parse_human(hval, unit, target_unit=None, integer=True, name=None):
             hval = f"{hval}{sipfx}"
         hval = f"{hval}{base_unit}"
 
-    specs, scalers, multiple = _tokenize_prepare(base_unit)
-    tokens = _tokenize(hval, specs, name, multiple=multiple)
+    specs, lcspecs, scalers, multiple = _tokenize_prepare(base_unit)
+    tokens = _tokenize(hval, specs, lcspecs, name, multiple=multiple)
 
     result = 0.0
     for base_unit, val in tokens.items():
@@ -429,6 +447,8 @@ def rangify(numbers):
 
     return ",".join(range_strs)
 
+_DIGITS = frozenset("0123456789")
+
 def uncapitalize(sentence):
     """
     Return 'sentence' but with the first letter in the first word modified from capital to small.
@@ -452,8 +472,7 @@ def uncapitalize(sentence):
         return sentence
 
     # Do nothing if there are digits in the word.
-    for char in word:
-        if char.isdigit():
-            return sentence
+    if not _DIGITS.isdisjoint(word):
+        return sentence
 
     return sentence[0].lower() + sentence[1:]
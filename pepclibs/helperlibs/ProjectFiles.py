@@ -14,6 +14,10 @@ from pathlib import Path
 from pepclibs.helperlibs import ProcessManager
 from pepclibs.helperlibs.Exceptions import ErrorNotFound
 
+# Project data paths found on the local host, indexed by '(prjname, datadir)'. The project layout
+# does not change at run-time, so there is no need to search for the same data more than once.
+_LOCAL_DATA_PATHS = {}
+
 def get_project_data_envvar(prjname):
     """
     Return the name of the environment variable that points to the data location of project
@@ -124,10 +128,20 @@ def find_project_data(prjname, datadir, pman=None, what=None):
       * in '$HOME/share/<prjname>/', if it exists.
       * in '/usr/local/share/<prjname>/', if it exists.
       * in '/usr/share/<prjname>/', if it exists.
+
+    Results for the local host are cached, so repeated calls do not search the file-system again.
     """
 
-    return next(search_project_data(prjname, datadir, pman, what,
-                                    envvars=(get_project_data_envvar(prjname),)))
+    envvars = (get_project_data_envvar(prjname),)
+
+    if pman:
+        return next(search_project_data(prjname, datadir, pman, what, envvars=envvars))
+
+    key = (prjname, datadir)
+    if key not in _LOCAL_DATA_PATHS:
+        _LOCAL_DATA_PATHS[key] = next(search_project_data(prjname, datadir, None, what,
+                                                          envvars=envvars))
+    return _LOCAL_DATA_PATHS[key]
 
 def get_project_data_search_descr(prjname, datadir):
     """
@@ -107,13 +107,13 @@ class ToolChecker(ClassHelpers.SimpleCloseContext):
                         if line.startswith("#"):
                             continue
 
-                        split_line = line.split("=")
-                        if len(split_line) != 2:
+                        key, sep, val = line.partition("=")
+                        if not sep:
                             _LOG.warning("unexpected line in '%s'%s:\n%s\nExpected lines have have "
                                          "'key=value' format.", path, self._pman.hostmsg, line)
                             continue
 
-                        osinfo[split_line[0]] = split_line[1].strip('"')
+                        osinfo[key] = val.strip('"')
             if osinfo:
                 break
 
@@ -282,6 +282,9 @@ def split_csv_line_int(csv_line, sep=",", dedup=False, base=0, what=None):
 
         result += range(range_vals[0], range_vals[1] + 1)
 
+    if dedup:
+        # The values were de-duplicated as strings, but ranges may still overlap.
+        return list_dedup(result)
     return result
 
 def parse_int_list(nums, sep=",", dedup=False, base=0, what=None):
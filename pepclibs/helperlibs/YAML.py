@@ -10,20 +10,31 @@
 This module provides helpers for loading and saving YAML files.
 """
 
+import os
+import copy
 import logging
 from pathlib import Path, PosixPath
 import yaml
 from pepclibs.helperlibs.Exceptions import Error
 
+# Use the 'libyaml'-based loader and dumper if they are available, they are much faster than the
+# pure python ones.
+try:
+    from yaml import CSafeLoader as _SafeLoader, CDumper as _Dumper
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader, Dumper as _Dumper
+
 _LOG = logging.getLogger()
 
-def dump(data, path, float_format=None, skip_none=False):
+# The parsed YAML files cache. Indexed by the '(path, mtime, size)' tuple, so that a modified file
+# does not hit the cache. Only the most recently added '_LOAD_CACHE_SIZE' entries are kept.
+_LOAD_CACHE = {}
+_LOAD_CACHE_SIZE = 32
+
+def _dump(data, fobj, float_format, skip_none):
     """
-    Dump dictionary 'data' to a file. The arguments as follows.
-      * path - either the path the to the file to dump to or a file object to dump to.
-      * float_format - the floating point output format. For example, if 'float_format' is '%.2f'
-                       then only 2 numbers after the decimal points will be used.
-      * skip_none: do not dump keys that have 'None' values.
+    Dump 'data' to file object 'fobj', or return the result as a string if 'fobj' is 'None'. The
+    other arguments are the same as in 'dump()'.
     """
 
     def represent_none(dumper, _):
@@ -40,44 +51,58 @@ def dump(data, path, float_format=None, skip_none=False):
 
     def copy_skip_none(data):
         """Create a copy of the 'data' dictionary and skip 'None' values."""
-        copy = {}
+        result = {}
         for key, val in data.items():
             if val is None:
                 continue
             if isinstance(val, dict):
-                copy[key] = copy_skip_none(val)
+                result[key] = copy_skip_none(val)
             else:
-                copy[key] = val
-        return copy
+                result[key] = val
+        return result
 
     if skip_none:
         data = copy_skip_none(data)
 
-    yaml.add_representer(type(None), represent_none)
-    yaml.add_representer(PosixPath, represent_posixpath)
+    yaml.add_representer(type(None), represent_none, Dumper=_Dumper)
+    yaml.add_representer(PosixPath, represent_posixpath, Dumper=_Dumper)
 
     if float_format:
-        yaml.add_representer(float, represent_float)
+        yaml.add_representer(float, represent_float, Dumper=_Dumper)
+
+    return yaml.dump(data, fobj, Dumper=_Dumper, default_flow_style=False, sort_keys=False)
+
+def dump(data, path, float_format=None, skip_none=False):
+    """
+    Dump dictionary 'data' to a file. The arguments as follows.
+      * path - either the path the to the file to dump to or a file object to dump to.
+      * float_format - the floating point output format. For example, if 'float_format' is '%.2f'
+                       then only 2 numbers after the decimal points will be used.
+      * skip_none: do not dump keys that have 'None' values.
+    """
 
     try:
         if hasattr(path, "write"):
-            yaml.dump(data, path, default_flow_style=False, sort_keys=False)
+            _dump(data, path, float_format, skip_none)
             _LOG.debug("wrote YAML file at '%s'", path.name)
         else:
             with open(path, "w", encoding="utf-8") as fobj:
-                yaml.dump(data, fobj, default_flow_style=False, sort_keys=False)
+                _dump(data, fobj, float_format, skip_none)
             _LOG.debug("wrote YAML file at '%s'", path)
     except OSError as err:
         msg = Error(err).indent(2)
         raise Error(f"failed to write YAML file '{path}:{msg}") from err
 
-def _load(path, included, render=None):
+def dumps(data, float_format=None, skip_none=False):
     """
-    Implements the 'load()' function. The additional 'included' argument is a dictionary containing
-    information on what files have already been included before, this is used as a countermeasure
-    against circular includes.
+    Dump 'data' to a string and return the result. The arguments are the same as in 'dump()'.
     """
 
+    return _dump(data, None, float_format, skip_none)
+
+def _parse(path, render):
+    """Parse YAML file 'path' and return the result. The arguments are the same as in 'load()'."""
+
     def path_constructor(_, node):
         """Convert strings marked with '!path' tag to pathlib.Path objects."""
         return Path(node.value)
@@ -99,9 +124,8 @@ def _load(path, included, render=None):
                             f"for internal functions")
         return dict(pairs)
 
-    yaml.SafeLoader.add_constructor(yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG,
-                                    dict_constructor)
-    yaml.SafeLoader.add_constructor("!path", path_constructor)
+    _SafeLoader.add_constructor(yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG, dict_constructor)
+    _SafeLoader.add_constructor("!path", path_constructor)
 
     fobj = None
     if render:
@@ -121,7 +145,7 @@ def _load(path, included, render=None):
         contents = fobj
 
     try:
-        loaded = yaml.safe_load(contents)
+        loaded = yaml.load(contents, Loader=_SafeLoader)
     except (TypeError, ValueError, yaml.YAMLError) as err:
         msg = Error(err).indent(2)
         raise Error(f"failed to parse YAML file '{path}':\n{msg}") from None
@@ -132,6 +156,36 @@ def _load(path, included, render=None):
         if fobj and fobj is not path:
             fobj.close()
 
+    return loaded
+
+def _load(path, included, render=None):
+    """
+    Implements the 'load()' function. The additional 'included' argument is a dictionary containing
+    information on what files have already been included before, this is used as a countermeasure
+    against circular includes.
+    """
+
+    # Only regular files are cached. Rendered files depend on the render function, and file-like
+    # objects can be read only once.
+    cache_key = None
+    if not render and not hasattr(path, "read"):
+        try:
+            stinfo = os.stat(path)
+            cache_key = (str(path), stinfo.st_mtime_ns, stinfo.st_size)
+        except OSError:
+            # Let '_parse()' report the error.
+            pass
+
+    if cache_key in _LOAD_CACHE:
+        # Return a copy to make sure the caller does not modify the cached data.
+        loaded = copy.deepcopy(_LOAD_CACHE[cache_key])
+    else:
+        loaded = _parse(path, render)
+        if cache_key:
+            if len(_LOAD_CACHE) >= _LOAD_CACHE_SIZE:
+                del _LOAD_CACHE[next(iter(_LOAD_CACHE))]
+            _LOAD_CACHE[cache_key] = copy.deepcopy(loaded)
+
     if not loaded:
         return {}
 
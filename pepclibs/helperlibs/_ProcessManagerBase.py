@@ -835,6 +835,8 @@ class ProcessManagerBase(ClassHelpers.SimpleCloseContext):
         """Initialize a class instance."""
 
         self.is_remote = None
+        # Whether the process manager emulates a host rather than running on a real one.
+        self.is_emulated = False
         self.hostname = None
         self.hostmsg = None
 
@@ -7,7 +7,7 @@
 # Author: Artem Bityutskiy <artem.bityutskiy@linux.intel.com>
 
 """
-This module provides API to MSR 0x1B1 (MSR_ENERGY_PERF_BIAS). This is an architectural MSR found on
+This module provides API to MSR 0x1B0 (MSR_ENERGY_PERF_BIAS). This is an architectural MSR found on
 many Intel platforms.
 """
 
@@ -39,7 +39,7 @@ FEATURES = {
 
 class EnergyPerfBias(_FeaturedMSR.FeaturedMSR):
     """
-    This class provides API to MSR 0x1B1 (MSR_ENERGY_PERF_BIAS). This is an architectural MSR found
+    This class provides API to MSR 0x1B0 (MSR_ENERGY_PERF_BIAS). This is an architectural MSR found
     on many Intel platforms.
     """
 
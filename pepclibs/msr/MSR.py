@@ -11,15 +11,49 @@
 Provide a capability to read and write CPU Model Specific Registers.
 """
 
+import os
+import fcntl
+import ctypes
 import pprint
 import logging
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from pepclibs.helperlibs import LocalProcessManager, FSHelpers, KernelModule, Trivial, ClassHelpers
 from pepclibs.helperlibs.Exceptions import Error, ErrorVerifyFailed, ErrorNotFound
 from pepclibs import _PerCPUCache
 
 _CPU_BYTEORDER = "little"
 
+# The 'msr-safe' driver batch device node. It allows for reading or writing MSRs on multiple CPUs
+# with a single 'ioctl()' call.
+_MSR_BATCH_DEV = Path("/dev/cpu/msr_batch")
+
+class _MSRBatchOp(ctypes.Structure):
+    """The 'msr-safe' driver 'struct msr_batch_op'."""
+
+    _fields_ = [("cpu", ctypes.c_uint16),
+                ("isrdmsr", ctypes.c_uint16),
+                ("err", ctypes.c_int32),
+                ("msr", ctypes.c_uint32),
+                ("msrdata", ctypes.c_uint64),
+                ("wmask", ctypes.c_uint64)]
+
+class _MSRBatchArray(ctypes.Structure):
+    """The 'msr-safe' driver 'struct msr_batch_array'."""
+
+    _fields_ = [("numops", ctypes.c_uint32),
+                ("ops", ctypes.POINTER(_MSRBatchOp))]
+
+# The 'X86_IOC_MSR_BATCH' ioctl number: _IOWR('c', 0xA2, struct msr_batch_array).
+_X86_IOC_MSR_BATCH = (3 << 30) | (ctypes.sizeof(_MSRBatchArray) << 16) | (ord("c") << 8) | 0xA2
+
+# When the batch device is not available, reading an MSR on at least this many CPUs of the local
+# host is done in parallel using a thread pool of up to '_MAX_READ_THREADS' threads. Every read is a
+# 'pread()' system call, which makes the kernel run the 'rdmsr' instruction on the target CPU, and
+# Python releases the GIL for the system call duration, so the reads overlap.
+_THREADED_READ_MIN_CPUS = 16
+_MAX_READ_THREADS = 32
+
 # A special value which can be used to specify that all bits have to be set to "1" in methods like
 # 'write_bits()'.
 ALL_BITS_1 = object()
@@ -113,6 +147,11 @@ class MSR(ClassHelpers.SimpleCloseContext):
         """Write the contents of the transaction buffer to the MSRs."""
 
         for cpu, cpus_info in self._transaction_buffer.items():
+            if self._use_fds:
+                for regaddr, regval_info in cpus_info.items():
+                    self._write_cpu_nocache(regaddr, regval_info["regval"], cpu)
+                continue
+
             # Write all the dirty data.
             path = Path(f"/dev/cpu/{cpu}/msr")
             with self._pman.open(path, "r+b") as fobj:
@@ -246,6 +285,22 @@ for cpu, cpus_info in transaction_buffer.items():
 
         return bits
 
+    def _get_bits_shift_mask(self, bits):
+        """
+        Validate bits range 'bits' and return the '(shift, mask)' tuple for it. The value of the
+        bits is '(regval >> shift) & mask'.
+        """
+
+        try:
+            return self._shift_masks[bits]
+        except (KeyError, TypeError):
+            pass
+
+        bits = self._normalize_bits(bits)
+        bits_cnt = (bits[0] - bits[1]) + 1
+        self._shift_masks[bits] = (bits[1], (1 << bits_cnt) - 1)
+        return self._shift_masks[bits]
+
     def get_bits(self, regval, bits):
         """
         Fetch bits 'bits' from an MSR value 'regval'. The arguments are as follows.
@@ -256,19 +311,51 @@ for cpu, cpus_info in transaction_buffer.items():
                    number would be 0, and the most significant bit number would be 63.
         """
 
-        bits = self._normalize_bits(bits)
-        bits_cnt = (bits[0] - bits[1]) + 1
-        mask = (1 << bits_cnt) - 1
-        return (regval >> bits[1]) & mask
+        shift, mask = self._get_bits_shift_mask(bits)
+        return (regval >> shift) & mask
+
+    def _get_fd(self, cpu, write=False):
+        """
+        Return the file descriptor of the '/dev/cpu/{cpu}/msr' device node. The file descriptors are
+        opened on first use and kept open until the object is closed. Raise 'Error' if 'write' is
+        'True', but the device node could only be opened for reading.
+        """
+
+        fd = self._fds.get(cpu)
+        path = f"/dev/cpu/{cpu}/msr"
+
+        if fd is None:
+            try:
+                try:
+                    fd = os.open(path, os.O_RDWR | os.O_CLOEXEC)
+                except PermissionError:
+                    # Reading MSRs does not require write access.
+                    fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+                    self._ro_cpus.add(cpu)
+            except OSError as err:
+                raise Error(f"failed to open file '{path}':\n{Error(err).indent(2)}") from None
+
+            self._fds[cpu] = fd
+
+        if write and cpu in self._ro_cpus:
+            raise Error(f"no write access to '{path}'")
+
+        return fd
 
     def _read_cpu_nocache(self, regaddr, cpu):
         """Read an MSR at address 'regaddr' on CPU 'cpu'."""
 
         path = Path(f"/dev/cpu/{cpu}/msr")
         try:
-            with self._pman.open(path, "rb") as fobj:
-                fobj.seek(regaddr)
-                regval = fobj.read(self.regbytes)
+            if self._use_fds:
+                try:
+                    regval = os.pread(self._get_fd(cpu), self.regbytes, regaddr)
+                except OSError as err:
+                    raise Error(err) from None
+            else:
+                with self._pman.open(path, "rb") as fobj:
+                    fobj.seek(regaddr)
+                    regval = fobj.read(self.regbytes)
         except Error as err:
             raise Error(f"failed to read MSR '{regaddr:#x}' from file '{path}'"
                         f"{self._pman.hostmsg}:\n{err.indent(2)}") from err
@@ -278,16 +365,115 @@ for cpu, cpus_info in transaction_buffer.items():
 
         return regval
 
-    def _read_remote_optimized(self, regaddr, cpus, iosname):
+    def _get_batch_fobj(self):
+        """
+        Return the 'msr-safe' batch device node file object, or 'None' if it is not available.
         """
-        An optimized implementation of 'read()' method for a remote host.
 
-        Observation: opening and reading multiple remote '/dev/msr/{cpu}' files from the local
-        system is significantly slower than running a script on the remote system and having the
-        script open/read the files.
+        if self._batch_checked:
+            return self._batch_fobj
 
-        Optimized solution: generate a small python script that reads the 'regaddr' MSR on 'cpus'
-        and prints the values, run the script on the remote host, parse script output.
+        self._batch_checked = True
+
+        # The batch device is accessed via 'ioctl()', which is possible only on the local host, and
+        # only when the MSR device nodes are accessed directly (e.g., not in case of emulation).
+        if not self._use_fds or not self._pman.exists(_MSR_BATCH_DEV):
+            return None
+
+        try:
+            self._batch_fobj = self._pman.open(_MSR_BATCH_DEV, "r+b")
+            _LOG.debug("using '%s' for batch MSR I/O", _MSR_BATCH_DEV)
+        except Error as err:
+            _LOG.debug("cannot use '%s' for batch MSR I/O, falling back to per-CPU MSR I/O:\n%s",
+                       _MSR_BATCH_DEV, err.indent(2))
+
+        return self._batch_fobj
+
+    def _batch_io(self, regaddr, cpus, regval=None):
+        """
+        Read or write MSR 'regaddr' on CPUs in 'cpus' using a single 'msr-safe' batch 'ioctl()'.
+        Read the MSR if 'regval' is 'None', otherwise write 'regval' to the MSR.
+
+        Return the list of '_MSRBatchOp' objects, one per CPU in 'cpus'. In case of a per-CPU
+        failure, the 'err' attribute of the corresponding object is non-zero.
+        """
+
+        ops = (_MSRBatchOp * len(cpus))()
+        for op, cpu in zip(ops, cpus):
+            op.cpu = cpu
+            op.msr = regaddr
+            if regval is None:
+                op.isrdmsr = 1
+            else:
+                op.msrdata = regval
+
+        batch = _MSRBatchArray(numops=len(cpus), ops=ops)
+        try:
+            fcntl.ioctl(self._batch_fobj.fileno(), _X86_IOC_MSR_BATCH, batch)
+        except OSError as err:
+            # The driver fails the entire ioctl if any of the operations failed, but it still
+            # updates the per-operation error codes. Mark all the operations as failed if it did
+            # not.
+            if not any(op.err for op in ops):
+                for op in ops:
+                    op.err = -(err.errno or 1)
+
+        return ops
+
+    def _read_batch_nocache(self, regaddr, cpus):
+        """
+        Read MSR 'regaddr' on CPUs in 'cpus' using the 'msr-safe' batch device. Fall back to
+        per-CPU reads for the CPUs the batch read failed for. Return a dictionary of MSR values
+        indexed by CPU number.
+        """
+
+        regvals = {}
+        for op in self._batch_io(regaddr, cpus):
+            if op.err:
+                regvals[op.cpu] = self._read_cpu_nocache(regaddr, op.cpu)
+            else:
+                regvals[op.cpu] = op.msrdata
+                _LOG.debug("CPU%d: MSR 0x%x: batch-read 0x%x", op.cpu, regaddr, op.msrdata)
+
+        return regvals
+
+    def _read_threaded_nocache(self, regaddr, cpus):
+        """
+        Read MSR 'regaddr' on CPUs in 'cpus' in parallel using a thread pool. Return a dictionary of
+        MSR values indexed by CPU number.
+        """
+
+        # Open the device nodes in this thread, so that the worker threads do not modify the file
+        # descriptors dictionary.
+        for cpu in cpus:
+            self._get_fd(cpu)
+
+        if not self._thread_pool:
+            self._thread_pool = ThreadPoolExecutor(max_workers=_MAX_READ_THREADS)
+
+        regvals = self._thread_pool.map(lambda cpu: self._read_cpu_nocache(regaddr, cpu), cpus)
+        return dict(zip(cpus, regvals))
+
+    def _write_batch_nocache(self, regaddr, regval, cpus):
+        """
+        Write 'regval' to MSR 'regaddr' on CPUs in 'cpus' using the 'msr-safe' batch device. Fall
+        back to per-CPU writes for the CPUs the batch write failed for.
+        """
+
+        regval_bytes = None
+        for op in self._batch_io(regaddr, cpus, regval=regval):
+            if op.err:
+                if regval_bytes is None:
+                    regval_bytes = regval.to_bytes(self.regbytes, byteorder=_CPU_BYTEORDER)
+                self._write_cpu_nocache(regaddr, regval, op.cpu, regval_bytes=regval_bytes)
+            else:
+                _LOG.debug("CPU%d: MSR 0x%x: batch-wrote 0x%x", op.cpu, regaddr, regval)
+
+    def _get_cpus_to_read(self, regaddr, cpus, iosname):
+        """
+        Return the list of CPUs in 'cpus' to read MSR 'regaddr' from when reading it for multiple
+        CPUs at once. Skip CPUs the MSR value is cached for. Also skip CPUs the MSR value will be
+        cached for by reading it from an 'iosname' sibling.
         """
 
         # CPU numbers to read the MSR for (subset of 'cpus').
@@ -321,22 +507,57 @@ for cpu, cpus_info in transaction_buffer.items():
                     # 'cpus'.
                     do_read.append(cpu)
 
-        if not do_read:
-            for cpu in cpus:
-                yield cpu, self._cache.get(regaddr, cpu)
-            return
+        return do_read
+
+    def _read_multi(self, regaddr, cpus, iosname, read_method):
+        """
+        Read MSR 'regaddr' on CPUs in 'cpus' using 'read_method()', which reads the MSR on multiple
+        CPUs at once and returns a dictionary of MSR values indexed by CPU number. Yield
+        '(cpu, regval)' tuples.
+        """
+
+        do_read = self._get_cpus_to_read(regaddr, cpus, iosname)
+
+        regvals = {}
+        if do_read:
+            regvals = read_method(regaddr, do_read)
+            for cpu, regval in regvals.items():
+                self._cache.add(regaddr, cpu, regval, sname=iosname)
+
+        for cpu in cpus:
+            regval = regvals.get(cpu)
+            if regval is None:
+                regval = self._cache.get(regaddr, cpu)
+            yield cpu, regval
+
+    def _read_remote_nocache(self, regaddr, cpus):
+        """
+        An optimized implementation of reading MSR 'regaddr' on multiple CPUs of a remote host.
+        Return a dictionary of MSR values indexed by CPU number.
+
+        Observation: opening and reading multiple remote '/dev/msr/{cpu}' files from the local
+        system is significantly slower than running a script on the remote system and having the
+        script open/read the files.
+
+        Optimized solution: generate a small python script that reads the 'regaddr' MSR on 'cpus'
+        and prints the values, run the script on the remote host, parse script output.
+        """
 
         python_path = self._pman.get_python_path()
-        cpus_str = ",".join([str(cpu) for cpu in do_read])
+        cpus_str = ",".join([str(cpu) for cpu in cpus])
+        # The script uses raw file descriptors and 'os.pread()' rather than buffered file objects,
+        # because a buffered read of a few MSR bytes allocates and fills a whole read buffer.
         cmd = f"""{python_path} -c '
+import os
 cpus = [{cpus_str}]
 for cpu in cpus:
-    path = "/dev/cpu/%d/msr" % cpu
-    with open(path, "rb") as fobj:
-        fobj.seek({regaddr})
-        regval = fobj.read({self.regbytes})
-        regval = int.from_bytes(regval, byteorder="{_CPU_BYTEORDER}")
-        print("%d,%d" % (cpu, regval))
+    fd = os.open("/dev/cpu/%d/msr" % cpu, os.O_RDONLY)
+    try:
+        regval = os.pread(fd, {self.regbytes}, {regaddr})
+    finally:
+        os.close(fd)
+    regval = int.from_bytes(regval, byteorder="{_CPU_BYTEORDER}")
+    print("%d,%d" % (cpu, regval))
 '"""
 
         stdout, _ = self._pman.run_verify(cmd, shell=True)
@@ -351,20 +572,22 @@ for cpu in cpus:
             regval = Trivial.str_to_int(split[1], what=f"MSR {regaddr:#x} value on CPU {cpu}")
 
             regvals[cpu] = regval
-            self._cache.add(regaddr, cpu, regval, sname=iosname)
 
-        for cpu in cpus:
-            regval = regvals.get(cpu)
-            if regval is None:
-                regval = self._cache.get(regaddr, cpu)
-            yield cpu, regval
+        return regvals
 
     def _read(self, regaddr, cpus, iosname):
         """Implement 'read()'."""
 
-        if self._pman.is_remote and len(cpus) > 1:
-            yield from self._read_remote_optimized(regaddr, cpus, iosname)
-            return
+        if len(cpus) > 1:
+            if self._pman.is_remote:
+                yield from self._read_multi(regaddr, cpus, iosname, self._read_remote_nocache)
+                return
+            if self._get_batch_fobj():
+                yield from self._read_multi(regaddr, cpus, iosname, self._read_batch_nocache)
+                return
+            if self._use_fds and len(cpus) >= _THREADED_READ_MIN_CPUS:
+                yield from self._read_multi(regaddr, cpus, iosname, self._read_threaded_nocache)
+                return
 
         for cpu in cpus:
             # Return the cached value if possible.
@@ -420,8 +643,9 @@ for cpu in cpus:
           * val - the value in MSR bits 'bits'.
         """
 
+        shift, mask = self._get_bits_shift_mask(bits)
         for cpu, regval in self.read(regaddr, cpus, iosname=iosname):
-            yield (cpu, self.get_bits(regval, bits))
+            yield (cpu, (regval >> shift) & mask)
 
     def read_cpu_bits(self, regaddr, bits, cpu, iosname="CPU"):
         """
@@ -435,18 +659,13 @@ for cpu in cpus:
         regval = self.read_cpu(regaddr, cpu, iosname=iosname)
         return self.get_bits(regval, bits)
 
-    def set_bits(self, regval, bits, val):
+    def _get_set_bits_masks(self, bits, val):
         """
-        Set bits 'bits' to value 'val' in an MSR value 'regval', and return the result. The
-        arguments are as follows.
-          * regval - an MSR value to set the bits in.
-          * bits - the bits range to set (similar to the 'bits' argument in 'get_bits()').
-          * val - the value to set the bits to.
+        Validate bits range 'bits' and value 'val', and return the '(clear_mask, set_mask)' tuple
+        for setting bits 'bits' to 'val'. The new MSR value is '(regval & ~clear_mask) | set_mask'.
         """
 
-        bits = self._normalize_bits(bits)
-        bits_cnt = (bits[0] - bits[1]) + 1
-        max_val = (1 << bits_cnt) - 1
+        shift, max_val = self._get_bits_shift_mask(bits)
 
         if val is ALL_BITS_1:
             val = max_val
@@ -458,8 +677,18 @@ for cpu in cpus:
         if val > max_val:
             raise Error(f"too large value {val} for bits range ({bits[0]}, {bits[1]})")
 
-        clear_mask = max_val << bits[1]
-        set_mask = val << bits[1]
+        return max_val << shift, val << shift
+
+    def set_bits(self, regval, bits, val):
+        """
+        Set bits 'bits' to value 'val' in an MSR value 'regval', and return the result. The
+        arguments are as follows.
+          * regval - an MSR value to set the bits in.
+          * bits - the bits range to set (similar to the 'bits' argument in 'get_bits()').
+          * val - the value to set the bits to.
+        """
+
+        clear_mask, set_mask = self._get_set_bits_masks(bits, val)
         return (regval & ~clear_mask) | set_mask
 
     def _write_cpu_nocache(self, regaddr, regval, cpu, regval_bytes=None, verify=False):
@@ -469,6 +698,15 @@ for cpu in cpus:
             regval_bytes = regval.to_bytes(self.regbytes, byteorder=_CPU_BYTEORDER)
 
         path = Path(f"/dev/cpu/{cpu}/msr")
+        if self._use_fds:
+            try:
+                os.pwrite(self._get_fd(cpu, write=True), regval_bytes, regaddr)
+            except OSError as err:
+                raise Error(f"failed to write '{regval:#x}' to MSR '{regaddr:#x}' of CPU "
+                            f"{cpu} (file '{path}'):\n{Error(err).indent(2)}") from None
+            _LOG.debug("CPU%d: MSR 0x%x: wrote 0x%x", cpu, regaddr, regval)
+            return
+
         with self._pman.open(path, "r+b") as fobj:
             try:
                 fobj.seek(regaddr)
@@ -479,6 +717,17 @@ for cpu in cpus:
                 raise Error(f"failed to write '{regval:#x}' to MSR '{regaddr:#x}' of CPU "
                             f"{cpu}{self._pman.hostmsg} (file '{path}'):\n{err.indent(2)}") from err
 
+    def _write_nocache(self, regaddr, regval, cpus):
+        """Write value 'regval' to MSR at 'regaddr' on CPUs in 'cpus'."""
+
+        if len(cpus) > 1 and self._get_batch_fobj():
+            self._write_batch_nocache(regaddr, regval, cpus)
+            return
+
+        regval_bytes = regval.to_bytes(self.regbytes, byteorder=_CPU_BYTEORDER)
+        for cpu in cpus:
+            self._write_cpu_nocache(regaddr, regval, cpu, regval_bytes=regval_bytes)
+
     def write(self, regaddr, regval, cpus="all", iosname="CPU", verify=False):
         """
         Write 'regval' to an MSR at 'regaddr' on CPUs in 'cpus'. The arguments are as follows.
@@ -491,7 +740,8 @@ for cpu in cpus:
         """
 
         cpus = self._cpuinfo.normalize_cpus(cpus)
-        regval_bytes = None
+        # CPU numbers to write the MSR for (subset of 'cpus').
+        write_cpus = []
 
         for cpu in cpus:
             self._cache.remove(regaddr, cpu, sname=iosname)
@@ -504,9 +754,7 @@ for cpu in cpus:
                 continue
 
             if not self._in_transaction:
-                if regval_bytes is None:
-                    regval_bytes = regval.to_bytes(self.regbytes, byteorder=_CPU_BYTEORDER)
-                self._write_cpu_nocache(regaddr, regval, cpu, regval_bytes=regval_bytes)
+                write_cpus.append(cpu)
             else:
                 self._add_for_transation(regaddr, regval, cpu, verify, iosname)
 
@@ -516,6 +764,14 @@ for cpu in cpus:
             # number 'cpu'.
             self._cache.add(regaddr, cpu, regval, sname=iosname)
 
+        if write_cpus:
+            try:
+                self._write_nocache(regaddr, regval, write_cpus)
+            except Error:
+                for cpu in cpus:
+                    self._cache.remove(regaddr, cpu, sname=iosname)
+                raise
+
         # In case of an ongoing transaction, skip the verification, it'll be done at the end of the
         # transaction.
         if verify and not self._in_transaction:
@@ -546,9 +802,11 @@ for cpu in cpus:
           * verify - same as in 'write()'.
         """
 
+        clear_mask, set_mask = self._get_set_bits_masks(bits, val)
+
         regvals = {}
         for cpu, regval in self.read(regaddr, cpus, iosname=iosname):
-            new_regval = self.set_bits(regval, bits, val)
+            new_regval = (regval & ~clear_mask) | set_mask
             if regval == new_regval:
                 continue
 
@@ -635,6 +893,25 @@ for cpu in cpus:
         self._msr_drv = None
         self._unload_msr_drv = False
 
+        # On the local host, the '/dev/cpu/{cpu}/msr' device nodes are accessed directly with
+        # 'os.pread()' and 'os.pwrite()' via file descriptors, which are kept open and indexed by
+        # CPU number. This avoids opening and closing the device node on every MSR access.
+        self._use_fds = not self._pman.is_remote and not self._pman.is_emulated
+        self._fds = {}
+        # CPU numbers the device nodes of which could only be opened for reading.
+        self._ro_cpus = set()
+
+        # The '(shift, mask)' tuples for the MSR bits ranges, indexed by the bits range.
+        self._shift_masks = {}
+
+        # The 'msr-safe' batch device node file object, opened on first use. 'None' if the batch
+        # device is not available.
+        self._batch_fobj = None
+        # Whether availability of the batch device was already checked.
+        self._batch_checked = False
+        # The thread pool for reading MSRs on many CPUs in parallel, created on first use.
+        self._thread_pool = None
+
         # The write-through per-CPU MSR values cache.
         self._cache = _PerCPUCache.PerCPUCache(self._cpuinfo, enable_cache=self._enable_cache)
         # Stores new MSR values to be written when 'commit_transaction()' is called.
@@ -647,9 +924,17 @@ for cpu in cpus:
     def close(self):
         """Uninitialize the class object."""
 
+        if getattr(self, "_thread_pool", None):
+            self._thread_pool.shutdown()
+            self._thread_pool = None
+
+        for fd in getattr(self, "_fds", {}).values():
+            os.close(fd)
+        self._fds = {}
+
         if self._unload_msr_drv:
             self._msr_drv.unload()
 
-        close_attrs = ("_pman", "_msr_drv", "_cache")
+        close_attrs = ("_batch_fobj", "_pman", "_msr_drv", "_cache")
         unref_attrs = ("_cpuinfo",)
         ClassHelpers.close(self, close_attrs=close_attrs, unref_attrs=unref_attrs)
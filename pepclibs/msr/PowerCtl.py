@@ -12,6 +12,7 @@ This module provides API to MSR 0x1FC (MSR_POWER_CTL). This is a model-specific
 many Intel platforms.
 """
 
+import copy
 from pepclibs import CPUModels
 from pepclibs.msr import _FeaturedMSR
 
@@ -19,16 +20,16 @@ from pepclibs.msr import _FeaturedMSR
 MSR_POWER_CTL = 0x1FC
 
 # CPU models supporting the C-state pre-wake feature.
-_CSTATE_PREWAKE_CPUS = (CPUModels.MODELS["GRANITERAPIDS_X"]["model"],
-                        CPUModels.MODELS["GRANITERAPIDS_D"]["model"],
-                        CPUModels.MODELS["EMERALDRAPIDS_X"]["model"],
-                        CPUModels.MODELS["SAPPHIRERAPIDS_X"]["model"],
-                        CPUModels.MODELS["ICELAKE_X"]["model"],
-                        CPUModels.MODELS["ICELAKE_D"]["model"],
-                        CPUModels.MODELS["SKYLAKE_X"]["model"],
-                        CPUModels.MODELS["BROADWELL_X"]["model"],
-                        CPUModels.MODELS["HASWELL_X"]["model"],
-                        CPUModels.MODELS["IVYBRIDGE_X"]["model"],)
+_CSTATE_PREWAKE_CPUS = frozenset((CPUModels.MODELS["GRANITERAPIDS_X"]["model"],
+                                   CPUModels.MODELS["GRANITERAPIDS_D"]["model"],
+                                   CPUModels.MODELS["EMERALDRAPIDS_X"]["model"],
+                                   CPUModels.MODELS["SAPPHIRERAPIDS_X"]["model"],
+                                   CPUModels.MODELS["ICELAKE_X"]["model"],
+                                   CPUModels.MODELS["ICELAKE_D"]["model"],
+                                   CPUModels.MODELS["SKYLAKE_X"]["model"],
+                                   CPUModels.MODELS["BROADWELL_X"]["model"],
+                                   CPUModels.MODELS["HASWELL_X"]["model"],
+                                   CPUModels.MODELS["IVYBRIDGE_X"]["model"],))
 
 # CPU models supporting the LTR feature.
 LTR_CPUS = (CPUModels.MODELS["GRANITERAPIDS_X"]["model"],
@@ -92,6 +93,23 @@ FEATURES = {
     },
 }
 
+# The features dictionaries with the scope names set, indexed by the scope name.
+_FEATURES_BY_SNAME = {}
+
+def _get_features(sname):
+    """
+    Return a copy of the 'FEATURES' dictionary with feature scope and I/O scope names set to
+    'sname'. The copies are cached, and the module-level 'FEATURES' dictionary is not modified.
+    """
+
+    if sname not in _FEATURES_BY_SNAME:
+        features = copy.deepcopy(FEATURES)
+        for finfo in features.values():
+            finfo["sname"] = finfo["iosname"] = sname
+        _FEATURES_BY_SNAME[sname] = features
+
+    return _FEATURES_BY_SNAME[sname]
+
 class PowerCtl(_FeaturedMSR.FeaturedMSR):
     """
     This class provides API to MSR 0x1FC (MSR_POWER_CTL). This is a model-specific register found on
@@ -105,8 +123,4 @@ class PowerCtl(_FeaturedMSR.FeaturedMSR):
     def _set_baseclass_attributes(self):
         """Set the attributes the superclass requires."""
 
-        self.features = FEATURES
-
-        sname = self._get_clx_ap_adjusted_msr_scope()
-        for finfo in self.features.values():
-            finfo["sname"] = finfo["iosname"] = sname
+        self.features = _get_features(self._get_clx_ap_adjusted_msr_scope())
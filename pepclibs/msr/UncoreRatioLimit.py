@@ -11,6 +11,8 @@ This module provides API to MSR 0x620 (MSR_UNCORE_RATIO_LIMIT). This MSR provide
 uncore frequency on Intel platforms.
 """
 
+import copy
+import itertools
 from pepclibs import CPUModels
 from pepclibs.msr import _FeaturedMSR
 
@@ -20,17 +22,17 @@ MSR_UNCORE_RATIO_LIMIT = 0x620
 #
 # CPU models that support the uncore ratio limit MSR.
 #
-_CPUS = CPUModels.MODEL_GROUPS["EMR"] + \
-        CPUModels.MODEL_GROUPS["METEORLAKE"] + \
-        CPUModels.MODEL_GROUPS["SPR"] + \
-        CPUModels.MODEL_GROUPS["RAPTORLAKE"] + \
-        (CPUModels.MODELS["ALDERLAKE"]["model"],
-         CPUModels.MODELS["ALDERLAKE_L"]["model"],) + \
-        CPUModels.MODEL_GROUPS["ICX"] + \
-        CPUModels.MODEL_GROUPS["SKX"] + \
-        (CPUModels.MODELS["BROADWELL_G"]["model"],
-         CPUModels.MODELS["BROADWELL_D"]["model"],
-         CPUModels.MODELS["BROADWELL_X"]["model"],)
+_CPUS = frozenset(itertools.chain(CPUModels.MODEL_GROUPS["EMR"],
+                                  CPUModels.MODEL_GROUPS["METEORLAKE"],
+                                  CPUModels.MODEL_GROUPS["SPR"],
+                                  CPUModels.MODEL_GROUPS["RAPTORLAKE"],
+                                  (CPUModels.MODELS["ALDERLAKE"]["model"],
+                                   CPUModels.MODELS["ALDERLAKE_L"]["model"],),
+                                  CPUModels.MODEL_GROUPS["ICX"],
+                                  CPUModels.MODEL_GROUPS["SKX"],
+                                  (CPUModels.MODELS["BROADWELL_G"]["model"],
+                                   CPUModels.MODELS["BROADWELL_D"]["model"],
+                                   CPUModels.MODELS["BROADWELL_X"]["model"],)))
 
 # Description of CPU features controlled by the the Turbo Ratio Limit MSR. Please, refer to the
 # notes for '_FeaturedMSR.FEATURES' for more comments.
@@ -59,6 +61,23 @@ FEATURES = {
     },
 }
 
+# The features dictionaries with the scope name set, indexed by the scope name.
+_FEATURES_BY_SNAME = {}
+
+def _get_features(sname):
+    """
+    Return a copy of the 'FEATURES' dictionary with feature scope names set to 'sname'. The copies
+    are cached, and the module-level 'FEATURES' dictionary is not modified.
+    """
+
+    if sname not in _FEATURES_BY_SNAME:
+        features = copy.deepcopy(FEATURES)
+        for finfo in features.values():
+            finfo["sname"] = sname
+        _FEATURES_BY_SNAME[sname] = features
+
+    return _FEATURES_BY_SNAME[sname]
+
 class UncoreRatioLimit(_FeaturedMSR.FeaturedMSR):
     """
     This class provides API to MSR 0x620 (MSR_UNCORE_RATIO_LIMIT). This MSR provides a way to limit
@@ -72,8 +91,4 @@ class UncoreRatioLimit(_FeaturedMSR.FeaturedMSR):
     def _set_baseclass_attributes(self):
         """Set the attributes the superclass requires."""
 
-        self.features = FEATURES
-
-        sname = self._get_clx_ap_adjusted_msr_scope()
-        for finfo in self.features.values():
-            finfo["sname"] = sname
+        self.features = _get_features(self._get_clx_ap_adjusted_msr_scope())
@@ -219,13 +219,16 @@ class FeaturedMSR(ClassHelpers.SimpleCloseContext):
                            fname, val, self.regaddr, self.regname, cpu, self._pman.hostmsg)
                 yield cpu, val
         else:
-            bits = self._features[fname]["bits"]
-            for cpu, val in self._msr.read_bits(self.regaddr, bits, cpus=cpus,
-                                                iosname=self._features[fname]["iosname"]):
-                if "rvals" in self._features[fname]:
-                    val = self._features[fname]["rvals"][val]
-                _LOG.debug("read_bits: read '%s' value '%s' from MSR %#x (%s) for CPU %s%s",
-                           fname, val, self.regaddr, self.regname, cpu, self._pman.hostmsg)
+            finfo = self._features[fname]
+            rvals = finfo.get("rvals")
+            debug = _LOG.getEffectiveLevel() == logging.DEBUG
+            for cpu, val in self._msr.read_bits(self.regaddr, finfo["bits"], cpus=cpus,
+                                                iosname=finfo["iosname"]):
+                if rvals:
+                    val = rvals[val]
+                if debug:
+                    _LOG.debug("read_bits: read '%s' value '%s' from MSR %#x (%s) for CPU %s%s",
+                               fname, val, self.regaddr, self.regname, cpu, self._pman.hostmsg)
                 yield cpu, val
 
     def read_cpu_feature(self, fname, cpu):
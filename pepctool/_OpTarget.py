@@ -42,6 +42,7 @@ class OpTarget(ClassHelpers.SimpleCloseContext):
         """Implements 'get_cpus()'."""
 
         cpus = []
+        cpuinfo = self._cpuinfo
         if exclude is None:
             exclude = []
 
@@ -53,37 +54,50 @@ class OpTarget(ClassHelpers.SimpleCloseContext):
         in_dies = self.dies if "module" not in exclude else []
         in_packages = self.packages if "module" not in exclude else []
 
+        # Count the sources of the CPU numbers. The input CPUs were normalized in '__init__()', and
+        # the CPUs derived from the topology are valid by definition. So if there is only one
+        # source, there are no duplicates and there is no need to normalize the resulting list.
+        sources = 0
+
         if in_cpus:
             cpus += in_cpus
+            sources += 1
 
         if in_cores:
             for pkg, cores in in_cores.items():
-                cpus += self._cpuinfo.cores_to_cpus(cores=cores, packages=(pkg,))
+                cpus += cpuinfo.cores_to_cpus(cores=cores, packages=(pkg,))
+            sources += 1
 
         if in_modules:
-            cpus += self._cpuinfo.modules_to_cpus(modules=in_modules)
+            cpus += cpuinfo.modules_to_cpus(modules=in_modules)
+            sources += 1
 
         if in_dies:
             for pkg, dies in in_dies.items():
-                cpus += self._cpuinfo.dies_to_cpus(dies=dies, packages=(pkg,))
+                cpus += cpuinfo.dies_to_cpus(dies=dies, packages=(pkg,))
+            sources += 1
 
         # Because cores and dies have relative numbers (as opposed to absolute CPU and package
         # numbers), when either of them was specified, packages list is treated as "package numbers
         # for core or die numbers", not as input packages. If no cores or dies were specified,
         # packages list is treated independently, as input packages.
         if in_packages and not (self.cores or self.dies):
-            cpus += self._cpuinfo.packages_to_cpus(packages=in_packages)
+            cpus += cpuinfo.packages_to_cpus(packages=in_packages)
+            sources += 1
 
         if in_core_siblings:
-            cpus = self._cpuinfo.select_core_siblings(cpus, in_core_siblings)
+            cpus = cpuinfo.select_core_siblings(cpus, in_core_siblings)
             # Handle the situation when both core an module siblings are targeted.
             if in_module_siblings:
-                return self._cpuinfo.select_module_siblings(cpus, in_module_siblings)
+                return cpuinfo.select_module_siblings(cpus, in_module_siblings)
 
         if in_module_siblings:
-            return self._cpuinfo.select_module_siblings(cpus, in_module_siblings)
+            return cpuinfo.select_module_siblings(cpus, in_module_siblings)
+
+        if sources < 2:
+            return cpus
 
-        return self._cpuinfo.normalize_cpus(cpus, offline_ok=self._offline_ok)
+        return cpuinfo.normalize_cpus(cpus, offline_ok=self._offline_ok)
 
     def _only_io_dies(self):
         """
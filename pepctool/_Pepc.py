@@ -23,7 +23,7 @@ except ImportError:
     # We can live without argcomplete, we only lose tab completions.
     argcomplete = None
 
-from pepclibs.helperlibs import ArgParse, Human, Logging, ProcessManager, ProjectFiles
+from pepclibs.helperlibs import ArgParse, Human, Logging, ProcessManager, ProjectFiles, Trivial
 from pepclibs.helperlibs.Exceptions import Error
 from pepclibs import CStates, PStates, Power, CPUInfo
 from pepclibs._PropsClassBase import MECHANISMS
@@ -72,12 +72,21 @@ _LIST_MECHANISMS_OPTION = {
     },
 }
 
+def _split_mechanisms(mechanisms):
+    """
+    Split the '--mechanisms' option value into a tuple of mechanism names. The names are validated
+    later, by '_PepcCommon.parse_mechanisms()', when the properties object is available.
+    """
+
+    return tuple(Trivial.split_csv_line(mechanisms, dedup=True))
+
 _CONFIG_MECHANISMS_OPTION = {
     "short": "-m",
     "long":  "--mechanisms",
     "argcomplete": None,
     "kwargs": {
         "dest": "mechanisms",
+        "type": _split_mechanisms,
         "help": """Comma-separated list of allowed mechanisms names (e.g., 'sysfs' or 'msr'). Use
                    '--list-mechanisms' to get all names. By default, use the best available
                    mechanism is used.""",
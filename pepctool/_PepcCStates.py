@@ -13,12 +13,16 @@ Implement the 'pepc cstates' command.
 import logging
 import contextlib
 from pepclibs.helperlibs.Exceptions import Error
-from pepclibs.msr import MSR
-from pepclibs import CStates, CPUInfo
-from pepctool import _PepcCommon, _OpTarget, _PepcPrinter, _PepcSetter
+from pepclibs import CPUInfo
+from pepctool import _PepcCommon, _OpTarget
 
 _LOG = logging.getLogger()
 
+# The heavier modules are imported in the command functions, so that they are loaded only when they
+# are needed, and not loaded at all if a command fails early due to bad arguments.
+#
+# pylint: disable=import-outside-toplevel
+
 def cstates_info_command(args, pman):
     """
     Implement the 'cstates info' command. The arguments are as follows.
@@ -26,6 +30,9 @@ def cstates_info_command(args, pman):
       * pman - the process manager object for the target host
     """
 
+    from pepclibs import CStates
+    from pepctool import _PepcPrinter
+
     # The output format to use.
     fmt = "yaml" if args.yaml else "human"
 
@@ -102,6 +109,10 @@ def cstates_config_command(args, pman):
         else:
             set_opts[optname] = optval
 
+    from pepclibs import CStates
+    from pepclibs.msr import MSR
+    from pepctool import _PepcPrinter, _PepcSetter
+
     with contextlib.ExitStack() as stack:
         cpuinfo = CPUInfo.CPUInfo(pman=pman)
         stack.enter_context(cpuinfo)
@@ -164,6 +175,9 @@ def cstates_save_command(args, pman):
       * pman - the process manager object for the target host
     """
 
+    from pepclibs import CStates
+    from pepctool import _PepcPrinter
+
     with contextlib.ExitStack() as stack:
         cpuinfo = CPUInfo.CPUInfo(pman=pman)
         stack.enter_context(cpuinfo)
@@ -175,7 +189,8 @@ def cstates_save_command(args, pman):
         if args.outfile:
             try:
                 # pylint: disable=consider-using-with
-                fobj = open(args.outfile, "w", encoding="utf-8")
+                fobj = open(args.outfile, "w", encoding="utf-8",
+                            buffering=_PepcCommon.OUTFILE_BUFSIZE)
             except OSError as err:
                 msg = Error(err).indent(2)
                 raise Error(f"failed to open file '{args.outfile}':\n{msg}") from None
@@ -209,6 +224,10 @@ def cstates_restore_command(args, pman):
         raise Error("please, specify the file to restore from (use '-' to restore from standard "
                     "input)")
 
+    from pepclibs import CStates
+    from pepclibs.msr import MSR
+    from pepctool import _PepcPrinter, _PepcSetter
+
     with contextlib.ExitStack() as stack:
         cpuinfo = CPUInfo.CPUInfo(pman=pman)
         stack.enter_context(cpuinfo)
@@ -17,6 +17,10 @@ from pepctool._OpTarget import ErrorNoTarget, ErrorNoCPUTarget
 
 _LOG = logging.getLogger()
 
+# Buffer size for the output files of the 'save' commands. The output consists of many small YAML
+# lines, use a large buffer to write them with few system calls.
+OUTFILE_BUFSIZE = 128 * 1024
+
 def check_tuned_presence(pman):
     """
     Check if the 'tuned' service is active, and if it is, print a warning message. The arguments are
@@ -35,6 +39,31 @@ def check_tuned_presence(pman):
     except Error as err:
         _LOG.warning("failed to check for 'tuned' presence:\n%s", err.indent(2))
 
+# The parsed numbers cache, indexed by the '(nums_str, what)' tuple.
+_PARSED_NUMS_CACHE = {}
+
+def parse_nums_string(nums_str, what):
+    """
+    Parse string of comma-separated numbers and number ranges, and return them as a list of
+    integers. The arguments are as follows.
+      * nums_str - a string of comma-separated numbers or number ranges to parse.
+      * what - a string describing the numbers, for the possible error message.
+
+    The results are cached, because the same strings are often parsed many times (e.g., when
+    restoring from a YAML file, where many entries have the same CPU numbers).
+    """
+
+    if not isinstance(nums_str, str):
+        return Trivial.parse_int_list(nums_str, dedup=True, what=what)
+
+    key = (nums_str, what)
+    if key not in _PARSED_NUMS_CACHE:
+        nums = Trivial.parse_int_list(nums_str, dedup=True, what=what)
+        _PARSED_NUMS_CACHE[key] = tuple(nums)
+
+    # Return a copy, the caller may modify it.
+    return list(_PARSED_NUMS_CACHE[key])
+
 def parse_cpus_string(cpus_str):
     """
     Parse string of comma-separated numbers and number ranges, and return them as a list of
@@ -44,7 +73,8 @@ def parse_cpus_string(cpus_str):
 
     if cpus_str == "all":
         return cpus_str
-    return Trivial.parse_int_list(cpus_str, dedup=True, what="CPU numbers")
+
+    return parse_nums_string(cpus_str, "CPU numbers")
 
 def override_cpu_model(cpuinfo, model):
     """
@@ -54,12 +84,15 @@ def override_cpu_model(cpuinfo, model):
     """
 
     model = str(model)
+
+    # Try decimal first, and treat anything else as a hexadecimal number, with or without the "0x"
+    # prefix.
     try:
         cpuinfo.info["model"] = int(model)
-    except (ValueError, TypeError):
+    except ValueError:
         try:
             cpuinfo.info["model"] = int(model, 16)
-        except (ValueError, TypeError):
+        except ValueError:
             raise Error(f"bad CPU model '{model}': should be an integer") from None
 
     cpuinfo.cpudescr += f" overridden to {cpuinfo.info['model']:#x}"
@@ -82,13 +115,9 @@ def expand_subprops(pnames, props):
     for pname in pnames:
         expanded.append(pname)
 
-        spnames = []
         prop = props.get(pname)
-        if prop:
-            spnames = prop.get("subprops", [])
-
-        for spname in spnames:
-            expanded.append(spname)
+        if prop and prop.get("subprops"):
+            expanded += prop["subprops"]
 
     return expanded
 
@@ -96,11 +125,16 @@ def parse_mechanisms(mechanisms, pobj):
     """
     Parse and validate a string of comma-separated mechanism names for a properties object 'pobj'.
     Return the resulting mechanism names list. The arguments are as follows.
-      * mechanisms - list of mechanism names to parse.
+      * mechanisms - a string of comma-separated mechanism names, or a collection of already split
+                     mechanism names (e.g., the '--mechanisms' option value) to parse.
       * pobj - a "properties" object ('PStates', 'CStates', etc) to parse the mechanisms for.
     """
 
-    mnames = Trivial.split_csv_line(mechanisms, dedup=True)
+    if isinstance(mechanisms, str):
+        mnames = Trivial.split_csv_line(mechanisms, dedup=True)
+    else:
+        mnames = list(mechanisms)
+
     for mname in mnames:
         if mname not in pobj.mechanisms:
             mnames = ", ".join(pobj.mechanisms)
@@ -144,7 +144,8 @@ def pstates_save_command(args, pman):
         if args.outfile != "-":
             try:
                 # pylint: disable=consider-using-with
-                fobj = open(args.outfile, "w", encoding="utf-8")
+                fobj = open(args.outfile, "w", encoding="utf-8",
+                            buffering=_PepcCommon.OUTFILE_BUFSIZE)
             except OSError as err:
                 msg = Error(err).indent(2)
                 raise Error(f"failed to open file '{args.outfile}':\n{msg}") from None
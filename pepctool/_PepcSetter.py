@@ -18,23 +18,39 @@ from pepclibs.helperlibs import ClassHelpers, YAML, Trivial
 from pepclibs.helperlibs.Exceptions import Error, ErrorNotSupported
 from pepclibs.PStates import ErrorFreqOrder
 
+# The frequency properties which have ordering constraints. Maps every min. or max. frequency
+# property name to the '(min. frequency property name, max. frequency property name)' tuple of its
+# group.
+_FREQ_GROUPS = {pname: group for group in (("min_freq", "max_freq"),
+                                           ("min_uncore_freq", "max_uncore_freq"))
+                for pname in group}
+
+# The scope name keys of the property information sub-dictionaries in a restore YAML file. Every
+# sub-dictionary must have exactly one of them.
+_SNAME_KEYS = ("CPU", "die", "package")
+
 class _PropsSetter(ClassHelpers.SimpleCloseContext):
     """This class provides API for changing P-state and C-state properties."""
 
+    __slots__ = ("_pman", "_pobj", "_cpuinfo", "_pcsprint", "_msr", "_sysfs_io", "_known_ykeys")
+
     def _set_prop_sname(self, spinfo, pname, optar, mnames, mnames_info):
-        """Set property 'pname' and handle frequency properties ordering."""
+        """
+        Set property 'pname' and handle frequency properties ordering. Properties which are already
+        in 'mnames_info' have been set, skip them.
+        """
 
-        if pname not in spinfo:
+        if pname in mnames_info:
             return
 
         try:
             mname = _PepcCommon.set_prop_sname(self._pobj, pname, optar,
                                                spinfo[pname], mnames=mnames)
-            del spinfo[pname]
             mnames_info[pname] = mname
             return
-        except ErrorFreqOrder as err:
-            if pname not in {"min_freq", "max_freq", "min_uncore_freq", "max_uncore_freq"}:
+        except ErrorFreqOrder:
+            freq_group = _FREQ_GROUPS.get(pname)
+            if not freq_group:
                 raise
 
             # Setting frequencies may be tricky because of the ordering constraints. Here is an
@@ -58,22 +74,20 @@ class _PropsSetter(ClassHelpers.SimpleCloseContext):
             # different order.
 
             freq_pname = pname
-            if pname.startswith("min"):
+            min_freq_pname, max_freq_pname = freq_group
+            if pname == min_freq_pname:
                 # Trying to set minimum frequency to a value higher than currently configured
                 # maximum frequency.
-                other_freq_pname = pname.replace("min", "max")
-            elif pname.startswith("max"):
-                other_freq_pname = pname.replace("max", "mim")
+                other_freq_pname = max_freq_pname
             else:
-                raise Error(f"BUG: unexpected property {pname}") from err
+                other_freq_pname = min_freq_pname
 
-            if other_freq_pname not in spinfo:
+            if other_freq_pname not in spinfo or other_freq_pname in mnames_info:
                 raise
 
             for pnm in (other_freq_pname, freq_pname):
                 mname = _PepcCommon.set_prop_sname(self._pobj, pnm, optar, spinfo[pnm],
                                                    mnames=mnames)
-                del spinfo[pnm]
                 mnames_info[pnm] = mname
 
     def set_props(self, spinfo, optar, mnames=None):
@@ -92,13 +106,12 @@ class _PropsSetter(ClassHelpers.SimpleCloseContext):
         if self._msr:
             self._msr.start_transaction()
 
-        # Remember the mechanism used for every option.
+        # Remember the mechanism used for every option. This also tells which properties have
+        # already been set.
         mnames_info = {}
-        # '_set_props()' needs to modify the dictionary, so create a copy for that.
-        spinfo_copy = spinfo.copy()
 
-        for pname in list(spinfo):
-            self._set_prop_sname(spinfo_copy, pname, optar, mnames, mnames_info)
+        for pname in spinfo:
+            self._set_prop_sname(spinfo, pname, optar, mnames, mnames_info)
 
         if self._msr:
             self._msr.commit_transaction()
@@ -115,39 +128,45 @@ class _PropsSetter(ClassHelpers.SimpleCloseContext):
     def _validate_loaded_data(ydict, known_ykeys):
         """Validate data loaded from a YAML file into a 'ydict' dictionary."""
 
-        if not isinstance(ydict, dict):
+        # The data comes from 'YAML.load()', which creates plain dictionaries and lists, so use the
+        # cheaper exact type checks instead of 'isinstance()'.
+        if type(ydict) is not dict: # pylint: disable=unidiomatic-typecheck
             raise Error(f"expected dictionary, got: '{type(ydict)}'")
 
+        if not known_ykeys.issuperset(ydict):
+            ykey = next(ykey for ykey in ydict if ykey not in known_ykeys)
+            all_pnames = ", ".join(known_ykeys)
+            raise Error(f"unknown key '{ykey}', known keys are:\n  {all_pnames}")
+
         for ykey, yvals in ydict.items():
-            if not isinstance(yvals, list):
+            if type(yvals) is not list: # pylint: disable=unidiomatic-typecheck
                 raise Error(f"expected 'list' type values for the key '{ykey}', got: "
                             f"'{type(yvals)}'")
 
-            if ykey not in known_ykeys:
-                all_pnames = ", ".join(known_ykeys)
-                raise Error(f"unknown key '{ykey}', known keys are:\n  {all_pnames}")
-
             for yval in yvals:
-                if not isinstance(yval, dict):
+                if type(yval) is not dict: # pylint: disable=unidiomatic-typecheck
                     raise Error(f"expected list of dictionaries for the key '{ykey}', got list "
                                 f"of: '{type(yval)}'")
 
-                for key in ("value",):
-                    if key not in yval:
-                        raise Error(f"did not find key '{key}' in the '{ykey}' sub-dictionary")
+                if "value" not in yval:
+                    raise Error(f"did not find key 'value' in the '{ykey}' sub-dictionary")
 
-                sname_keys = ("CPU", "die", "package")
-                found = []
-                for key in sname_keys:
-                    if key in yval:
-                        found.append(key)
+                found = [key for key in _SNAME_KEYS if key in yval]
+                if len(found) == 1:
+                    continue
 
-                if len(found) == 0:
+                if not found:
                     raise Error(f"did not find one of the following keys in the '{ykey}' "
-                                f"sub-dictionary: {', '.join(sname_keys)}")
-                if len(found) > 1:
-                    raise Error(f"found multiple scope name keys in the '{ykey}' sub-dictionary, "
-                                f"expected only one of {', '.join(sname_keys)}")
+                                f"sub-dictionary: {', '.join(_SNAME_KEYS)}")
+                raise Error(f"found multiple scope name keys in the '{ykey}' sub-dictionary, "
+                            f"expected only one of {', '.join(_SNAME_KEYS)}")
+
+    def _get_known_ykeys(self):
+        """Return the set of keys a YAML file with properties to restore may include."""
+
+        if self._known_ykeys is None:
+            self._known_ykeys = frozenset(self._pobj.props)
+        return self._known_ykeys
 
     def _restore_prop(self, pname, sname, val, nums):
         """Restore property 'pname' to value 'val' for CPUs, dies, or packages in  'nums'."""
@@ -166,24 +185,58 @@ class _PropsSetter(ClassHelpers.SimpleCloseContext):
             _set_prop(self._pobj, pname, sname, val, nums)
             return
         except ErrorFreqOrder:
-            if pname not in {"min_freq", "max_freq", "min_uncore_freq", "max_uncore_freq"}:
+            if pname not in _FREQ_GROUPS:
                 raise
 
         # Setting frequency may be tricky because there are ordering constraints.
-        if pname in {"min_freq", "max_freq"}:
-            min_freq_pname = "min_freq"
-            max_freq_pname = "max_freq"
-        else:
-            min_freq_pname = "min_uncore_freq"
-            max_freq_pname = "max_uncore_freq"
+        min_freq_pname, max_freq_pname = _FREQ_GROUPS[pname]
 
-        if pname.startswith("min_"):
+        if pname == min_freq_pname:
             _set_prop(self._pobj, max_freq_pname, sname, "max", nums)
             _set_prop(self._pobj, min_freq_pname, sname, val, nums)
-        elif pname.startswith("max_"):
+        else:
             _set_prop(self._pobj, min_freq_pname, sname, "min", nums)
             _set_prop(self._pobj, max_freq_pname, sname, val, nums)
 
+    @staticmethod
+    def _parse_pinfo_nums(pinfo):
+        """
+        Parse the CPU, die, or package numbers of a property information sub-dictionary 'pinfo'
+        loaded from a YAML file. Return a '(sname, nums)' tuple.
+        """
+
+        if "CPU" in pinfo:
+            sname = "CPU"
+        elif "package" in pinfo:
+            sname = "package"
+        else:
+            sname = "die"
+
+        what = f"{sname} numbers"
+        if sname in ("CPU", "package"):
+            nums = _PepcCommon.parse_nums_string(pinfo[sname], what)
+        else:
+            nums = {}
+            for pkg, dies in pinfo[sname].items():
+                nums[pkg] = _PepcCommon.parse_nums_string(dies, what)
+
+        return sname, nums
+
+    @staticmethod
+    def _merge_nums(sname, nums1, nums2):
+        """
+        Merge CPU, die, or package numbers 'nums1' and 'nums2' of scope 'sname' and return the
+        result.
+        """
+
+        if sname != "die":
+            return Trivial.list_dedup(nums1 + nums2)
+
+        merged_nums = dict(nums1)
+        for pkg, dies in nums2.items():
+            merged_nums[pkg] = Trivial.list_dedup(merged_nums.get(pkg, []) + dies)
+        return merged_nums
+
     def _restore_props(self, ydict):
         """Restore properties from a loaded YAML file and represented by 'ydict'."""
 
@@ -192,36 +245,60 @@ class _PropsSetter(ClassHelpers.SimpleCloseContext):
         if self._msr:
             self._msr.start_transaction()
 
+        restore_prop = self._restore_prop
+        parse_pinfo_nums = self._parse_pinfo_nums
+
+        # The CPU, die, or package numbers to print the restored properties for, indexed by the
+        # '(pname, sname)' tuple. The properties are printed once the transactions are committed.
+        to_print = {}
+
         for pname, pinfos in ydict.items():
             for pinfo in pinfos:
-                if "CPU" in pinfo:
-                    sname = "CPU"
-                elif "package" in pinfo:
-                    sname = "package"
-                else:
-                    sname = "die"
+                sname, nums = parse_pinfo_nums(pinfo)
+                restore_prop(pname, sname, pinfo["value"], nums)
 
-                what = f"{sname} numbers"
-                if sname in ("CPU", "package"):
-                    nums = Trivial.parse_int_list(pinfo[sname], dedup=True, what=what)
+                key = (pname, sname)
+                if key in to_print:
+                    to_print[key] = self._merge_nums(sname, to_print[key], nums)
                 else:
-                    nums = {}
-                    for pkg, dies in pinfo[sname].items():
-                        nums[pkg] = Trivial.parse_int_list(dies, dedup=True, what=what)
-
-                self._restore_prop(pname, sname, pinfo["value"], nums)
-
-                if self._pcsprint:
-                    kwargs = {f"{sname.lower()}s": nums}
-                    optar = _OpTarget.OpTarget(pman=self._pman, cpuinfo=self._cpuinfo, **kwargs)
-                    self._pcsprint.print_props((pname,), optar, skip_ro=True,
-                                               skip_unsupported=False, action="restored to")
+                    to_print[key] = nums
 
         if self._msr:
             self._msr.commit_transaction()
         if self._sysfs_io:
             self._sysfs_io.commit_transaction()
 
+        if not self._pcsprint:
+            return
+
+        for (pname, sname), nums in to_print.items():
+            kwargs = {f"{sname.lower()}s": nums}
+            optar = _OpTarget.OpTarget(pman=self._pman, cpuinfo=self._cpuinfo, **kwargs)
+            self._pcsprint.print_props((pname,), optar, skip_ro=True, skip_unsupported=False,
+                                       action="restored to")
+
+    def _load_ydict(self, infile):
+        """
+        Load and validate a YAML file with properties to restore and return the resulting
+        dictionary. The arguments are the same as in 'restore()'.
+        """
+
+        if infile == "-":
+            infile = sys.stdin
+
+        ydict = YAML.load(infile)
+        self._validate_loaded_data(ydict, self._get_known_ykeys())
+
+        return ydict
+
+    def restore(self, infile):
+        """
+        Load and set properties from a YAML file. The arguments are as follows:
+          * infile - path to the properties YAML file ("-" means standard input).
+        """
+
+        self._restore_props(self._load_ydict(infile))
+
     def __init__(self, pman, pobj, cpuinfo, pcsprint, msr=None, sysfs_io=None):
         """
         Initialize a class instance. The arguments are as follows.
@@ -241,6 +318,9 @@ class _PropsSetter(ClassHelpers.SimpleCloseContext):
         self._msr = msr
         self._sysfs_io = sysfs_io
 
+        # The known YAML file keys, built on first use by '_get_known_ykeys()'.
+        self._known_ykeys = None
+
     def close(self):
         """Uninitialize the class object."""
         ClassHelpers.close(self, unref_attrs=("_sysfs_io", "_msr", "_pcsprint", "_cpuinfo", "_pobj",
@@ -249,43 +329,25 @@ class _PropsSetter(ClassHelpers.SimpleCloseContext):
 class PStatesSetter(_PropsSetter):
     """This class provides API for changing P-states properties."""
 
-    def restore(self, infile):
-        """
-        Load and set properties from a YAML file. The arguments are as follows:
-          * infile - path to the properties YAML file ("-" means standard input).
-        """
-
-        if infile == "-":
-            infile = sys.stdin
-
-        ydict = YAML.load(infile)
-
-        known_ykeys = set(self._pobj.props)
-        self._validate_loaded_data(ydict, known_ykeys)
-
-        self._restore_props(ydict)
+    __slots__ = ()
 
 class PowerSetter(_PropsSetter):
     """This class provides API for changing power settings."""
 
-    def restore(self, infile):
-        """
-        Load and set properties from a YAML file. The arguments are as follows:
-          * infile - path to the properties YAML file ("-" means standard input).
-        """
+    __slots__ = ()
 
-        if infile == "-":
-            infile = sys.stdin
+class CStatesSetter(_PropsSetter):
+    """This class provides API for changing P-states properties."""
 
-        ydict = YAML.load(infile)
+    __slots__ = ("_csnames",)
 
-        known_ykeys = set(self._pobj.props)
-        self._validate_loaded_data(ydict, known_ykeys)
+    def __init__(self, pman, pobj, cpuinfo, pcsprint, msr=None, sysfs_io=None):
+        """The class constructor. The arguments are the same as in '_PropsSetter.__init__()'."""
 
-        self._restore_props(ydict)
+        super().__init__(pman, pobj, cpuinfo, pcsprint, msr=msr, sysfs_io=sysfs_io)
 
-class CStatesSetter(_PropsSetter):
-    """This class provides API for changing P-states properties."""
+        # The C-state names, built on first use by '_get_csnames()'.
+        self._csnames = None
 
     def set_cstates(self, csnames="all", cpus="all", enable=True, mnames=None):
         """
@@ -326,35 +388,49 @@ class CStatesSetter(_PropsSetter):
                 self._pcsprint.print_cstates(csnames=(csname,), cpus=cpus, skip_ro=True,
                                              action="set to")
 
+    def _get_csnames(self):
+        """Return the set of C-state names of all CPUs."""
+
+        if self._csnames is None:
+            csnames = set()
+            with contextlib.suppress(ErrorNotSupported):
+                for _, csinfo in self._pobj.get_cstates_info(csnames="all", cpus="all"):
+                    csnames.update(csinfo)
+            self._csnames = frozenset(csnames)
+
+        return self._csnames
+
+    def _get_known_ykeys(self):
+        """
+        Return the set of keys a YAML file with C-state settings and properties to restore may
+        include.
+        """
+
+        if self._known_ykeys is None:
+            self._known_ykeys = frozenset(self._pobj.props).union(self._get_csnames())
+        return self._known_ykeys
+
     def restore(self, infile):
         """
         Load and set C-state settings and properties from a YAML file. The arguments are as follows:
           * infile - path to the properties YAML file ("-" means standard input).
         """
 
-        csnames = set()
-        with contextlib.suppress(ErrorNotSupported):
-            for _, csinfo in self._pobj.get_cstates_info(csnames="all", cpus="all"):
-                for csname in csinfo:
-                    csnames.add(csname)
-
-        if infile == "-":
-            infile = sys.stdin
-
-        ydict = YAML.load(infile)
-
-        known_ykeys = set(self._pobj.props)
-        known_ykeys.update(csnames)
-        self._validate_loaded_data(ydict, known_ykeys)
-
-        # Separate out C-states and properties information from 'ydict'.
-        props_ydict = {}
-        cs_ydict = {}
-        for ykey, yval in ydict.items():
-            if ykey in csnames:
-                cs_ydict[ykey] = yval
-            else:
-                props_ydict[ykey] = yval
+        csnames = self._get_csnames()
+        ydict = self._load_ydict(infile)
+
+        # Separate out C-states and properties information from 'ydict'. Preserve the order of the
+        # keys, because it defines the order the settings are restored in.
+        cs_ykeys = ydict.keys() & csnames
+        if not cs_ykeys:
+            cs_ydict = {}
+            props_ydict = ydict
+        elif len(cs_ykeys) == len(ydict):
+            cs_ydict = ydict
+            props_ydict = {}
+        else:
+            cs_ydict = {ykey: yval for ykey, yval in ydict.items() if ykey in cs_ykeys}
+            props_ydict = {ykey: yval for ykey, yval in ydict.items() if ykey not in cs_ykeys}
 
         self._restore_cstates(cs_ydict)
         self._restore_props(props_ydict)
@@ -18,6 +18,19 @@ from pepclibs.helperlibs.Exceptions import Error
 
 _LOG = logging.getLogger()
 
+# The 'tpmi read' output line prefixes, indexed by the nesting level: feature, PCI address,
+# instance, register, and bit field.
+_PFX = ("- ", "  - ", "    - ", "      - ", "        - ")
+# The prefix of the package number line, which belongs to the PCI address level.
+_PACKAGE_PFX = "    "
+
+# YAML representations of the strings in the 'tpmi read --yaml' output, indexed by the string.
+_YAML_STRS = {}
+# Strings of this length and longer may be formatted as complex mapping keys ("? key") by the YAML
+# library ('libyaml' does this only for longer strings, the pure python implementation - for strings
+# of this length as well).
+_YAML_MAX_KEY_LEN = 128
+
 def _ls_long(fname, tpmi, prefix=""):
     """Print extra information about feature 'fname' (in case of the 'tpmi ls -l' command)."""
 
@@ -28,25 +41,30 @@ def _ls_long(fname, tpmi, prefix=""):
     info = {}
 
     for addr, package, instance in tpmi.iter_feature(fname):
-        if package not in info:
-            info[package] = {}
-        if addr not in info[package]:
-            info[package][addr] = set()
-        info[package][addr].add(instance)
+        info.setdefault(package, {}).setdefault(addr, set()).add(instance)
+
+    first_pfx1 = prefix + "- "
+    first_pfx2 = prefix + "  "
+
+    # Collect the output lines and print them with a single log call.
+    lines = []
 
     for package in sorted(info):
-        pfx1 = prefix + "- "
-        pfx2 = prefix + "  "
+        pfx1 = first_pfx1
+        pfx2 = first_pfx2
 
         for addr in sorted(info[package]):
-            _LOG.info("%sPCI address: %s", pfx1, addr)
+            lines.append(f"{pfx1}PCI address: {addr}")
             pfx1 = pfx2 + "- "
             pfx2 += "  "
 
-            _LOG.info("%sPackage: %s", pfx2, package)
+            lines.append(f"{pfx2}Package: {package}")
 
             instances = Human.rangify(info[package][addr])
-            _LOG.info("%sInstances: %s", pfx2, instances)
+            lines.append(f"{pfx2}Instances: {instances}")
+
+    if lines:
+        _LOG.info("\n".join(lines))
 
 def tpmi_ls_command(args, pman):
     """
@@ -77,34 +95,176 @@ def tpmi_ls_command(args, pman):
 def _tpmi_read_command_print(tpmi, info):
     """Print the 'tpmi read' commnad output from the pre-populated dictionary 'info'."""
 
-    pfx = "- "
-    nopfx = "  "
+    if not _LOG.isEnabledFor(logging.INFO):
+        return
+
+    # Collect the output lines and print them with a single log call.
+    lines = []
+
     for fname, feature_info in info.items():
-        pfx_indent = 0
-        _LOG.info("%sTPMI feature: %s", " " * pfx_indent + pfx, fname)
+        lines.append(f"{_PFX[0]}TPMI feature: {fname}")
 
         fdict = tpmi.get_fdict(fname)
         for addr, addr_info in feature_info.items():
-            pfx_indent = 2
-            _LOG.info("%sPCI address: %s", " " * pfx_indent + pfx, addr)
-            _LOG.info("%sPackage: %d", " " * pfx_indent + nopfx, addr_info["package"])
+            lines.append(f"{_PFX[1]}PCI address: {addr}")
+            lines.append(f"{_PACKAGE_PFX}Package: {addr_info['package']:d}")
 
             for instance, instance_info in addr_info["instances"].items():
-                pfx_indent = 4
-                _LOG.info("%sInstance: %d", " " * pfx_indent + pfx, instance)
+                lines.append(f"{_PFX[2]}Instance: {instance:d}")
 
                 for regname, reginfo in instance_info.items():
-                    pfx_indent = 6
-                    _LOG.info("%s%s: %#x", " " * pfx_indent + pfx, regname, reginfo["value"])
+                    lines.append(f"{_PFX[3]}{regname}: {reginfo['value']:#x}")
 
                     if "fields" not in reginfo:
                         continue
 
+                    fields = fdict[regname]["fields"]
                     for bfname, bfval in reginfo["fields"].items():
-                        bfinfo = fdict[regname]["fields"][bfname]
-                        pfx_indent = 8
-                        _LOG.info("%s%s[%s]: %d",
-                                  " " * pfx_indent + pfx, bfname, bfinfo["bits"], bfval)
+                        lines.append(f"{_PFX[4]}{bfname}[{fields[bfname]['bits']}]: {bfval:d}")
+
+    if lines:
+        _LOG.info("\n".join(lines))
+
+def _yaml_str(val):
+    """
+    Return YAML representation of string 'val' for using as a mapping key, or 'None' if it cannot be
+    represented as a single line simple key.
+    """
+
+    if val not in _YAML_STRS:
+        rep = None
+        if len(val) < _YAML_MAX_KEY_LEN:
+            # Let the YAML library decide whether the string should be quoted or not.
+            lines = YAML.dumps(val).splitlines()
+            if len(lines) == 1 or (len(lines) == 2 and lines[1] == "..."):
+                rep = lines[0]
+        _YAML_STRS[val] = rep
+
+    return _YAML_STRS[val]
+
+def _format_yaml_mapping(indent, key, mapping):
+    """
+    Format the first line of a YAML mapping 'mapping' with key 'key', taking into account that empty
+    mappings are formatted as "{}".
+    """
+
+    if mapping:
+        return f"{indent}{key}:"
+    return f"{indent}{key}: {{}}"
+
+def _get_yaml_lines(info):
+    """
+    Format the 'tpmi read' command information dictionary 'info' in YAML format and return the list
+    of lines. Return 'None' if the dictionary includes strings that cannot be formatted as simple
+    one-line mapping keys.
+
+    The result is the same as 'YAML.dump()' produces, but it is much faster, because it relies on
+    the fixed structure of the 'info' dictionary.
+    """
+
+    lines = []
+    for fname, feature_info in info.items():
+        key = _yaml_str(fname)
+        if not key:
+            return None
+        lines.append(_format_yaml_mapping("", key, feature_info))
+
+        for addr, addr_info in feature_info.items():
+            key = _yaml_str(addr)
+            if not key:
+                return None
+            lines.append(f"  {key}:")
+            lines.append(f"    package: {addr_info['package']}")
+            lines.append(_format_yaml_mapping("    ", "instances", addr_info["instances"]))
+
+            for instance, instance_info in addr_info["instances"].items():
+                lines.append(_format_yaml_mapping("      ", instance, instance_info))
+
+                for regname, reginfo in instance_info.items():
+                    key = _yaml_str(regname)
+                    if not key:
+                        return None
+                    lines.append(f"        {key}:")
+                    lines.append(f"          value: {reginfo['value']}")
+
+                    if "fields" not in reginfo:
+                        continue
+
+                    lines.append("          fields:")
+                    for bfname, bfval in reginfo["fields"].items():
+                        key = _yaml_str(bfname)
+                        if not key:
+                            return None
+                        lines.append(f"            {key}: {bfval}")
+
+    return lines
+
+def _tpmi_read_command_yaml(info):
+    """Print the 'tpmi read' commnad output from the pre-populated dictionary 'info' in YAML."""
+
+    lines = _get_yaml_lines(info)
+    if not lines:
+        YAML.dump(info, sys.stdout)
+    else:
+        sys.stdout.write("\n".join(lines) + "\n")
+
+def _get_reginfo(tpmi, fname, regname, regval, bfnames):
+    """
+    Return the information dictionary for TPMI register 'regname' with value 'regval' for the 'tpmi
+    read' command. The 'bfnames' argument is the list of bit field names to include.
+    """
+
+    reginfo = {"value": regval}
+    bfinfo = tpmi.get_bitfields(regval, fname, regname, bfnames)
+
+    # No bit fields information, probably all of them are reserved. Do not add the "fields" key
+    # so that it does not show up in the output.
+    if bfinfo:
+        reginfo["fields"] = bfinfo
+
+    return reginfo
+
+def _get_feature_info(tpmi, fname, addrs, packages, instances, regnames, bfnames):
+    """
+    Read TPMI registers of feature 'fname' and return the feature information dictionary for the
+    'tpmi read' command. The 'addrs', 'packages', 'instances', 'regnames', and 'bfnames' arguments
+    limit what is read, 'None' means "all".
+    """
+
+    finfo = {}
+    fdict = tpmi.get_fdict(fname)
+
+    if not regnames:
+        # Read all registers except for the reserved ones.
+        regnames = [regname for regname in fdict if not regname.startswith("RESERVED")]
+
+    # The names of the bit fields to read for every register, excluding the reserved ones. Unknown
+    # register names are skipped here, they are reported by 'read_registers()'.
+    if bfnames:
+        bfnames = [bfname for bfname in bfnames if not bfname.startswith("RESERVED")]
+        reg_bfnames = dict.fromkeys(regnames, bfnames)
+    else:
+        reg_bfnames = {}
+        for regname in regnames:
+            if regname in fdict:
+                reg_bfnames[regname] = [bfname for bfname in fdict[regname]["fields"]
+                                        if not bfname.startswith("RESERVED")]
+
+    for addr, package, instance in tpmi.iter_feature(fname, addrs=addrs, packages=packages,
+                                                     instances=instances):
+        addr_info = finfo.get(addr)
+        if addr_info is None:
+            addr_info = finfo[addr] = {"package": package, "instances": {}}
+
+        assert instance not in addr_info["instances"]
+        regvals = tpmi.read_registers(fname, addr, instance, regnames)
+
+        instance_info = addr_info["instances"][instance] = {}
+        for regname, regval in regvals.items():
+            instance_info[regname] = _get_reginfo(tpmi, fname, regname, regval,
+                                                  reg_bfnames[regname])
+
+    return finfo
 
 def tpmi_read_command(args, pman):
     """
@@ -145,55 +305,18 @@ def tpmi_read_command(args, pman):
     if args.bfnames:
         bfnames = Trivial.split_csv_line(args.bfnames, dedup=True)
 
-    # Prepare all the information to print in the 'info' dictionary.
-    info = {}
-    for fname in fnames:
-        info[fname] = {}
-
-        fdict = tpmi.get_fdict(fname)
-
-        if not args.registers:
-            # Read all registers except for the reserved ones.
-            regnames = [regname for regname in fdict if not regname.startswith("RESERVED")]
-
-        for addr, package, instance in tpmi.iter_feature(fname, addrs=addrs, packages=packages,
-                                                         instances=instances):
-            if addr not in info[fname]:
-                info[fname][addr] = {"package": package, "instances": {}}
-
-            assert instance not in info[fname][addr]["instances"]
-            info[fname][addr]["instances"][instance] = {}
-
-            for regname in regnames:
-                regval = tpmi.read_register(fname, addr, instance, regname)
-
-                assert regname not in info[fname][addr]["instances"][instance]
-                bfinfo = {}
-                reginfo = {"value": regval, "fields": bfinfo}
-                info[fname][addr]["instances"][instance][regname] = reginfo
-
-                if not args.bfnames:
-                    bfnames = fdict[regname]["fields"]
-
-                for bfname in bfnames:
-                    if bfname.startswith("RESERVED"):
-                        continue
-
-                    bfval = tpmi.get_bitfield(regval, fname, regname, bfname)
-                    bfinfo[bfname] = bfval
-
-                if not bfinfo:
-                    # No bit fields information, probably all of them are reserved. Delete the
-                    # entire "fields" key so that it does not show up in the output.
-                    del reginfo["fields"]
-
-    if not info:
+    if not fnames:
         raise Error("BUG: no matches")
 
-    if args.yaml:
-        YAML.dump(info, sys.stdout)
-    else:
-        _tpmi_read_command_print(tpmi, info)
+    # Read and print the features one by one, so that the output starts as soon as the first
+    # feature is read, and the information about all the features is never kept in memory at once.
+    for fname in fnames:
+        info = {fname: _get_feature_info(tpmi, fname, addrs, packages, instances, regnames,
+                                         bfnames)}
+        if args.yaml:
+            _tpmi_read_command_yaml(info)
+        else:
+            _tpmi_read_command_print(tpmi, info)
 
 def tpmi_write_command(args, pman):
     """
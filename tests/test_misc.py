@@ -15,6 +15,8 @@ import random
 import pytest
 import common
 from pepclibs import CPUInfo, PStates, CStates, _PropsCache
+from pepclibs.helperlibs import Trivial
+from pepclibs.helperlibs.Exceptions import Error
 from pepctool import _Pepc
 
 @pytest.fixture(name="params", scope="module")
@@ -91,3 +93,15 @@ def test_parse_arguments(params): # pylint: disable=unused-argument
         except SystemExit:
             continue
         assert False, f"'pepc {option}' didn't system exit"
+
+def test_split_csv_line_int(params): # pylint: disable=unused-argument
+    """Test 'Trivial.split_csv_line_int()', including overlapping number ranges."""
+
+    assert Trivial.split_csv_line_int("0,1-3,7") == [0, 1, 2, 3, 7]
+    assert Trivial.split_csv_line_int("0-3,2") == [0, 1, 2, 3, 2]
+    assert Trivial.split_csv_line_int("0-3,2", dedup=True) == [0, 1, 2, 3]
+    assert Trivial.split_csv_line_int("4-6,0-5,5", dedup=True) == [4, 5, 6, 0, 1, 2, 3]
+    assert Trivial.split_csv_line_int("1,1,0-1", dedup=True) == [1, 0]
+
+    with pytest.raises(Error):
+        Trivial.split_csv_line_int("3-1")
@@ -10,10 +10,14 @@
 
 """Unittests for the public methods of the 'MSR' module."""
 
+import os
+import time
+import types
 import pytest
 import common
 import msr_common
 from msr_common import get_params # pylint: disable=unused-import
+from pepclibs.msr import MSR
 from pepclibs.msr.TurboRatioLimit import MSR_TURBO_RATIO_LIMIT
 from pepclibs.msr.TurboRatioLimit1 import MSR_TURBO_RATIO_LIMIT1
 from pepclibs.msr.PackagePowerLimit import MSR_PKG_POWER_LIMIT
@@ -372,3 +376,179 @@ def test_msr_write_cpu_bits(params):
 
     _test_msr_write_cpu_bits_good(params)
     _test_msr_write_cpu_bits_bad(params)
+
+class _FakeBatchFobj:
+    """A fake 'msr-safe' batch device node file object."""
+
+    def fileno(self):
+        """Return a fake file descriptor number."""
+        return -1
+
+    def close(self):
+        """Do nothing."""
+
+def _get_batch_msr_obj(params, monkeypatch, ioctl):
+    """
+    Create and return an 'MSR' object which uses a fake 'msr-safe' batch device with 'ioctl()'
+    replaced by 'ioctl'.
+    """
+
+    msr = MSR.MSR(params["cpuinfo"], pman=params["pman"], enable_cache=False)
+    msr._batch_fobj = _FakeBatchFobj() # pylint: disable=protected-access
+    msr._batch_checked = True # pylint: disable=protected-access
+    monkeypatch.setattr(MSR.fcntl, "ioctl", ioctl)
+    return msr
+
+def test_msr_batch_io(params, monkeypatch):
+    """Test reading and writing MSRs via the 'msr-safe' batch device using a fake 'ioctl()'."""
+
+    cpus = params["cpus"][:8]
+    bad_cpu = cpus[3]
+    regaddr = MSR_TURBO_RATIO_LIMIT
+    regval = 0x1234
+    ioctl_calls = []
+
+    def _ioctl(_, request, batch):
+        """Emulate the batch 'ioctl()', fail the operation for CPU 'bad_cpu'."""
+
+        assert request == MSR._X86_IOC_MSR_BATCH # pylint: disable=protected-access
+        ioctl_calls.append(batch.numops)
+
+        for idx in range(batch.numops):
+            op = batch.ops[idx]
+            assert op.msr == regaddr
+            if op.cpu == bad_cpu:
+                op.err = -5
+            elif op.isrdmsr:
+                op.msrdata = op.cpu + 100
+            else:
+                assert op.msrdata == regval
+
+        raise OSError(5, "Input/output error")
+
+    fallback_cpus = []
+
+    def _read_cpu_nocache(_, cpu):
+        """Emulate a per-CPU MSR read."""
+
+        fallback_cpus.append(cpu)
+        return cpu + 200
+
+    def _write_cpu_nocache(_, val, cpu, **kwargs): # pylint: disable=unused-argument
+        """Emulate a per-CPU MSR write."""
+
+        assert val == regval
+        fallback_cpus.append(cpu)
+
+    with _get_batch_msr_obj(params, monkeypatch, _ioctl) as msr:
+        monkeypatch.setattr(msr, "_read_cpu_nocache", _read_cpu_nocache)
+        monkeypatch.setattr(msr, "_write_cpu_nocache", _write_cpu_nocache)
+
+        # The batch read should be used, and only the failed CPU should be read individually.
+        regvals = list(msr.read(regaddr, cpus=cpus))
+        expected = [(cpu, cpu + 200 if cpu == bad_cpu else cpu + 100) for cpu in cpus]
+        assert regvals == expected
+        assert ioctl_calls == [len(cpus)]
+        assert fallback_cpus == [bad_cpu]
+
+        ioctl_calls.clear()
+        fallback_cpus.clear()
+
+        msr.write(regaddr, regval, cpus=cpus)
+        assert ioctl_calls == [len(cpus)]
+        assert fallback_cpus == [bad_cpu]
+
+    def _ioctl_fail(*_):
+        """Emulate a batch 'ioctl()' failure which does not set the per-operation errors."""
+        raise OSError(19, "No such device")
+
+    fallback_cpus.clear()
+    with _get_batch_msr_obj(params, monkeypatch, _ioctl_fail) as msr:
+        monkeypatch.setattr(msr, "_read_cpu_nocache", _read_cpu_nocache)
+
+        # All CPUs should be read individually.
+        regvals = list(msr.read(regaddr, cpus=cpus))
+        assert regvals == [(cpu, cpu + 200) for cpu in cpus]
+        assert fallback_cpus == cpus
+
+def test_msr_batch_emulated(params):
+    """Verify that the batch device is never used when the MSR device nodes are not used."""
+
+    with MSR.MSR(params["cpuinfo"], pman=params["pman"]) as msr:
+        msr._use_fds = False # pylint: disable=protected-access
+        assert msr._get_batch_fobj() is None # pylint: disable=protected-access
+
+def test_msr_read_threaded(params, monkeypatch):
+    """Test reading an MSR on many CPUs in parallel using fake MSR device nodes."""
+
+    cpus = params["cpus"]
+    # One of the CPUs is excluded from the successful read, so one more CPU than the threaded read
+    # threshold is required.
+    if len(cpus) <= MSR._THREADED_READ_MIN_CPUS: # pylint: disable=protected-access
+        pytest.skip(f"too few CPUs ({len(cpus)}) for threaded MSR reads")
+
+    regaddr = MSR_TURBO_RATIO_LIMIT
+    bad_cpu = cpus[len(cpus) // 2]
+    fdoffs = 1000
+
+    def _pread(fd, size, offset):
+        """Emulate reading an MSR from a device node, fail for CPU 'bad_cpu'."""
+
+        cpu = fd - fdoffs
+        if cpu == bad_cpu:
+            raise OSError(5, "Input/output error")
+        assert offset == regaddr
+        # Make the reads complete out of order.
+        time.sleep(0.001 * (cpu % 3))
+        return (cpu + offset).to_bytes(size, byteorder="little")
+
+    with MSR.MSR(params["cpuinfo"], pman=params["pman"], enable_cache=False) as msr:
+        # pylint: disable=protected-access
+        msr._use_fds = True
+        msr._batch_checked = True
+        monkeypatch.setattr(msr, "_get_fd", lambda cpu: cpu + fdoffs)
+        # Replace 'os.pread()' only for the 'MSR' module.
+        fake_os = types.SimpleNamespace(**{**vars(os), "pread": _pread})
+        monkeypatch.setattr(MSR, "os", fake_os)
+
+        good_cpus = [cpu for cpu in reversed(cpus) if cpu != bad_cpu]
+        regvals = list(msr.read(regaddr, cpus=good_cpus))
+        assert msr._thread_pool
+        assert regvals == [(cpu, cpu + regaddr) for cpu in good_cpus]
+
+        with pytest.raises(Error):
+            list(msr.read(regaddr, cpus=cpus))
+
+def test_msr_write_read_only(params, monkeypatch):
+    """
+    Test that writing an MSR fails with a clear error if the MSR device node could only be opened
+    for reading.
+    """
+
+    cpu = params["cpus"][0]
+    fd = 1000
+
+    def _open(path, flags):
+        """Emulate opening an MSR device node without write permissions."""
+
+        assert path == f"/dev/cpu/{cpu}/msr"
+        if flags & os.O_RDWR:
+            raise PermissionError(13, "Permission denied")
+        return fd
+
+    def _pwrite(*_):
+        """Fail the test if a write was attempted."""
+        assert False, "unexpected 'pwrite()' call"
+
+    with MSR.MSR(params["cpuinfo"], pman=params["pman"], enable_cache=False) as msr:
+        # pylint: disable=protected-access
+        msr._use_fds = True
+        fake_os = types.SimpleNamespace(**{**vars(os), "open": _open, "pwrite": _pwrite})
+        monkeypatch.setattr(MSR, "os", fake_os)
+
+        assert msr._get_fd(cpu) == fd
+        with pytest.raises(Error, match="no write access"):
+            msr.write_cpu(MSR_TURBO_RATIO_LIMIT, 0, cpu)
+
+        # Do not close the fake file descriptor.
+        msr._fds = {}
@@ -15,7 +15,7 @@ import pytest
 import common
 import props_common
 from pepclibs.helperlibs.Exceptions import Error, ErrorNotSupported
-from pepclibs.helperlibs import Human, YAML
+from pepclibs.helperlibs import Human, Trivial, YAML
 from pepclibs import CPUInfo, PStates
 
 # If the '--mechanism' option is present, the command may fail because the mechanism may not be
@@ -437,6 +437,73 @@ def test_pstates_save_restore(params):
     read_back = YAML.load(state_read_back_path)
     assert read_back == state, "restoring P-states configuration failed"
 
+def _get_saved_cpu_vals(params, pname):
+    """
+    Save P-states configuration and return a dictionary mapping CPU numbers to values of CPU-scope
+    property 'pname'.
+    """
+
+    pman = params["pman"]
+    path = params["tmp_path"] / f"state_cpu_vals.{params['hostname']}"
+
+    common.run_pepc(f"pstates save -o {path}", pman)
+
+    cpu_vals = {}
+    for pinfo in YAML.load(path)[pname]:
+        for cpu in Trivial.split_csv_line_int(pinfo["CPU"]):
+            cpu_vals[cpu] = pinfo["value"]
+
+    return cpu_vals
+
+def test_pstates_restore_repeated_values(params):
+    """
+    Test 'pepc pstates restore' with a hand-written file where the same property value repeats and
+    the entries of the property overlap. The entries should be applied in the file order.
+    """
+
+    pman = params["pman"]
+    pobj = params["pobj"]
+    cpuinfo = params["cpuinfo"]
+
+    pname = "governor"
+    pvinfo = pobj.get_cpu_prop("governors", 0)
+    if pvinfo["val"] is None or len(pvinfo["val"]) < 2:
+        return
+
+    pkg_cpus = cpuinfo.package_to_cpus(0)
+    if len(pkg_cpus) < 4:
+        return
+
+    val0, val1 = pvinfo["val"][:2]
+    cpu0, cpu1, cpu2, cpu3 = pkg_cpus[:4]
+
+    state_path = params["tmp_path"] / f"state_repeated.{params['hostname']}"
+    common.run_pepc(f"pstates save -o {state_path}", pman)
+
+    # The same values repeat, and CPUs 1 and 3 are included in several entries with different
+    # values, so that the result depends on the order the entries are applied in.
+    all_cpus = Human.rangify(pkg_cpus)
+    ydict = {pname: [{"value": val0, "CPU": f"{cpu0}"},
+                     {"value": val1, "CPU": all_cpus},
+                     {"value": val0, "CPU": f"{cpu1}"},
+                     {"value": val1, "CPU": f"{cpu2}"},
+                     {"value": val0, "CPU": f"{cpu3}"},
+                     {"value": val1, "CPU": f"{cpu1}"},
+                     {"value": val0, "CPU": f"{cpu1},{cpu3}"}]}
+
+    restore_path = params["tmp_path"] / f"restore_repeated.{params['hostname']}"
+    YAML.dump(ydict, restore_path)
+    common.run_pepc(f"pstates restore -f {restore_path}", pman)
+
+    cpu_vals = _get_saved_cpu_vals(params, pname)
+    for cpu in pkg_cpus:
+        if cpu in (cpu1, cpu3):
+            assert cpu_vals[cpu] == val0, f"bad '{pname}' value for CPU {cpu}"
+        else:
+            assert cpu_vals[cpu] == val1, f"bad '{pname}' value for CPU {cpu}"
+
+    common.run_pepc(f"pstates restore -f {state_path}", pman)
+
 def _set_freq_pairs(params, min_pname, max_pname):
     """
     Set min. and max frequencies to various values in order to verify that the 'PState' modules set
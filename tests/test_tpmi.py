@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+#
+# -*- coding: utf-8 -*-
+# vim: ts=4 sw=4 tw=100 et ai si
+#
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Unittests for the 'Tpmi' module."""
+
+import io
+import sys
+import random
+import shutil
+from pathlib import Path
+from pepclibs import Tpmi
+from pepclibs.helperlibs import LocalProcessManager, YAML
+from pepctool import _PepcTpmi
+
+# The test TPMI feature spec file.
+_TEST_SPEC = """name: "tpmitest"
+desc: >-
+    Test TPMI feature
+feature-id: 0x42
+
+registers:
+    REG32_0:
+        fields:
+            FIELD:
+                bits: "31:0"
+                desc: "The entire register"
+        offset: 0
+        width: 32
+    REG64_4:
+        fields:
+            LOW:
+                bits: "31:0"
+                desc: "The low 32 bits"
+            HIGH:
+                bits: "63:32"
+                desc: "The high 32 bits"
+        offset: 4
+        width: 64
+    REG32_12:
+        fields:
+            FIELD:
+                bits: "31:0"
+                desc: "The entire register"
+        offset: 12
+        width: 32
+    REG64_16:
+        fields:
+            FIELD:
+                bits: "63:0"
+                desc: "The entire register"
+        offset: 16
+        width: 64
+"""
+
+# The test TPMI feature instances count and the size of an instance in bytes.
+_INSTANCES = 3
+_INSTANCE_SIZE = 32
+
+def _create_mem_dump(path, words):
+    """
+    Create a fake TPMI 'mem_dump' file at 'path'. The 'words' argument is a list of 32-bit values
+    lists, one list per TPMI instance.
+    """
+
+    lines = []
+    for instance, iwords in enumerate(words):
+        lines.append(f"TPMI Instance:{instance} offset:0x{0x40005000 + instance * 0x1000:08x}")
+        for idx in range(0, len(iwords), 4):
+            vals = " ".join(f"{word:08x}" for word in iwords[idx:idx + 4])
+            lines.append(f" {idx * 4:08x}: {vals}")
+
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+def _create_debugfs(basepath):
+    """
+    Create a fake TPMI debugfs directory and spec files directory in 'basepath'. Return a tuple of
+    the debugfs directory path, spec files directory path, and the list of 32-bit words of the test
+    TPMI feature instances.
+    """
+
+    specdir = basepath / "specs"
+    specdir.mkdir()
+    tpmi_info_spec = Path(__file__).parent.parent / "tpmi" / "tpmi_info.yml"
+    shutil.copy(tpmi_info_spec, specdir)
+    (specdir / "tpmitest.yml").write_text(_TEST_SPEC, encoding="utf-8")
+
+    rnd = random.Random(1)
+
+    devpath = basepath / "debugfs" / "tpmi-0000:00:03.1"
+
+    # The 'tpmi_info' feature, the package number is in bits 23:16 of the register at offset 8.
+    fpath = devpath / "tpmi-id-81"
+    fpath.mkdir(parents=True)
+    _create_mem_dump(fpath / "mem_dump", [[0x1, 0, 0x10001, 0]])
+
+    fpath = devpath / "tpmi-id-42"
+    fpath.mkdir()
+    words = []
+    for _ in range(_INSTANCES):
+        words.append([rnd.getrandbits(32) for _ in range(_INSTANCE_SIZE // 4)])
+    _create_mem_dump(fpath / "mem_dump", words)
+
+    return basepath / "debugfs", specdir, words
+
+def test_tpmi_read_registers(hostspec, tmp_path, monkeypatch): # pylint: disable=unused-argument
+    """
+    Test that 'read_registers()' returns the same values as 'read_register()' for 32-bit and 64-bit
+    TPMI registers. The TPMI debugfs files are faked on the local host, so 'hostspec' is not used.
+    """
+
+    debugfs_path, specdir, words = _create_debugfs(tmp_path)
+    monkeypatch.setattr(Tpmi.FSHelpers, "mount_debugfs",
+                        lambda mnt=None, pman=None: (debugfs_path, False))
+
+    regnames = ("REG32_0", "REG64_4", "REG32_12", "REG64_16")
+
+    with LocalProcessManager.LocalProcessManager() as pman:
+        tpmi = Tpmi.Tpmi(pman, specdirs=[specdir])
+        instances = []
+        try:
+            for addr, package, instance in tpmi.iter_feature("tpmitest"):
+                instances.append(instance)
+                assert addr == "0000:00:03.1"
+                assert package == 1
+
+                iwords = words[instance]
+                expected = {"REG32_0": iwords[0],
+                            "REG64_4": iwords[1] | (iwords[2] << 32),
+                            "REG32_12": iwords[3],
+                            "REG64_16": iwords[4] | (iwords[5] << 32)}
+
+                regvals = tpmi.read_registers("tpmitest", addr, instance, regnames)
+                assert regvals == expected
+
+                for regname in regnames:
+                    regval = tpmi.read_register("tpmitest", addr, instance, regname)
+                    assert regval == regvals[regname]
+
+                bfvals = tpmi.get_bitfields(regvals["REG64_4"], "tpmitest", "REG64_4",
+                                            ("LOW", "HIGH"))
+                assert bfvals == {"LOW": iwords[1], "HIGH": iwords[2]}
+        finally:
+            tpmi.close()
+
+    assert instances == list(range(_INSTANCES))
+
+def test_tpmi_fdict_not_shared(hostspec, tmp_path, monkeypatch): # pylint: disable=unused-argument
+    """
+    Test that modifying the fdict of one 'Tpmi' object does not affect other 'Tpmi' objects. The
+    TPMI debugfs files are faked on the local host, so 'hostspec' is not used.
+    """
+
+    debugfs_path, specdir, _ = _create_debugfs(tmp_path)
+    monkeypatch.setattr(Tpmi.FSHelpers, "mount_debugfs",
+                        lambda mnt=None, pman=None: (debugfs_path, False))
+
+    with LocalProcessManager.LocalProcessManager() as pman:
+        tpmi1 = Tpmi.Tpmi(pman, specdirs=[specdir])
+        tpmi2 = None
+        try:
+            fdict1 = tpmi1.get_fdict("tpmitest")
+            fdict1["REG32_0"]["fields"]["FIELD"]["bitmask"] = 0
+            del fdict1["REG32_12"]
+
+            tpmi2 = Tpmi.Tpmi(pman, specdirs=[specdir])
+            fdict2 = tpmi2.get_fdict("tpmitest")
+            assert fdict2["REG32_0"]["fields"]["FIELD"]["bitmask"] == 0xFFFFFFFF
+            assert "REG32_12" in fdict2
+        finally:
+            tpmi1.close()
+            if tpmi2:
+                tpmi2.close()
+
+# Strings for testing the 'tpmi read --yaml' output formatting, including the ones which have to be
+# quoted.
+_YAML_TEST_STRS = ("rapl", "0000:00:03.1", "SOCKET_RAPL_PL1_CONTROL", "yes", "null", "1.5", "0x10",
+                   "a: b", "#comment", "- item", "", " space", "caf\u00e9", "'quote'", "a" * 127)
+
+def _get_random_info(rnd, strs):
+    """Return a random 'tpmi read' command information dictionary using strings in 'strs'."""
+
+    info = {}
+    for fname in rnd.sample(strs, rnd.randint(0, 2)):
+        finfo = info[fname] = {}
+        for addr in rnd.sample(strs, rnd.randint(0, 2)):
+            instances = {}
+            finfo[addr] = {"package": rnd.randint(0, 3), "instances": instances}
+            for instance in range(rnd.randint(0, 2)):
+                iinfo = instances[instance] = {}
+                for regname in rnd.sample(strs, rnd.randint(0, 3)):
+                    reginfo = iinfo[regname] = {"value": rnd.getrandbits(64)}
+                    bfnames = rnd.sample(strs, rnd.randint(0, 3))
+                    if bfnames:
+                        reginfo["fields"] = {bfname: rnd.getrandbits(8) for bfname in bfnames}
+
+    return info
+
+def _get_read_yaml_output(info, monkeypatch):
+    """Run the 'tpmi read --yaml' command output function for 'info' and return the output."""
+
+    # pylint: disable=protected-access
+    fobj = io.StringIO()
+    # 'YAML.dump()' logs the file object name.
+    fobj.name = "<stdout>"
+    monkeypatch.setattr(sys, "stdout", fobj)
+    _PepcTpmi._tpmi_read_command_yaml(info)
+    monkeypatch.undo()
+
+    return fobj.getvalue()
+
+def test_tpmi_read_yaml(hostspec, monkeypatch): # pylint: disable=unused-argument
+    """
+    Test that the 'tpmi read --yaml' command output is the same as what 'YAML.dumps()' produces.
+    This test does not depend on the host, so 'hostspec' is not used.
+    """
+
+    # pylint: disable=protected-access
+    rnd = random.Random(1)
+
+    for _ in range(500):
+        info = _get_random_info(rnd, _YAML_TEST_STRS)
+        if info:
+            assert _PepcTpmi._get_yaml_lines(info) is not None
+        assert _get_read_yaml_output(info, monkeypatch) == YAML.dumps(info)
+
+    # Long strings may be formatted as complex mapping keys, 'YAML.dump()' should be used for them.
+    for length in (128, 129, 200):
+        info = {}
+        while not info:
+            info = _get_random_info(rnd, tuple(char * length for char in "bcd"))
+        assert _PepcTpmi._get_yaml_lines(info) is None
+        assert _get_read_yaml_output(info, monkeypatch) == YAML.dumps(info)